@@ -0,0 +1,110 @@
+"""העברת חודשים סגורים מ-reports לארכיון Parquet
+
+כל חודש שהסתיים לפני KEEP_MONTHS החודשים האחרונים נכתב לקובץ Parquet משלו
+בתיקייה מחולקת לפי חודש (archive/reports/month=YYYY-MM/), ונמחק מ-reports.
+הכתיבה, המחיקה, הרישום ב-report_archive והיצירה מחדש של התצוגה reports_all
+נעשים בטרנזקציה אחת: קובץ שנכתב בטרנזקציה שלא הסתיימה אינו רשום ולכן אינו
+נקרא, ונמחק בהרצה הבאה (remove_orphans).
+
+shift_hours ו-weekly_hours אינם מועברים לארכיון - הם קטנים בהרבה מ-reports,
+וסיכומי השעות ממשיכים להגיע מהם לכל תאריך.
+"""
+import os
+from datetime import timedelta
+
+import clock
+import db
+
+ARCHIVE_DIR = "archive"
+KEEP_MONTHS = 3
+
+ARCHIVE_SUMMARY_QUERY = """
+SELECT
+    (SELECT COUNT(*) FROM reports),
+    COALESCE(SUM(rows), 0),
+    COUNT(DISTINCT month),
+    COALESCE(SUM(bytes), 0)
+FROM report_archive
+"""
+
+ARCHIVE_MONTHS_QUERY = """
+SELECT month, SUM(rows), SUM(bytes), COUNT(*), strftime(MAX(archived_at), '%d/%m/%Y %H:%M')
+FROM report_archive
+GROUP BY month
+ORDER BY month DESC
+"""
+
+
+def archive_dir(db_path):
+    """תיקיית הארכיון - לצד קובץ מסד הנתונים"""
+    return os.path.join(os.path.dirname(db_path), ARCHIVE_DIR)
+
+
+def cutoff(today, keep_months=KEEP_MONTHS):
+    """תחילת החודש הראשון שנשאר ב-reports: החודש הנוכחי ועוד keep_months - 1 לפניו"""
+    if keep_months < 1:
+        raise ValueError("יש להשאיר לפחות את החודש הנוכחי")
+    month = today.replace(day=1)
+    for _ in range(keep_months - 1):
+        month = (month - timedelta(days=1)).replace(day=1)
+    return clock.start_of_day(month)
+
+
+def archive_reports(con, directory, before):
+    """העברת כל הדיווחים שלפני before לארכיון, חודש אחר חודש (יש לקרוא בתוך טרנזקציה)
+
+    מחזיר רשימת (חודש, מספר דיווחים) שהועברו.
+    """
+    local = f"timezone('{db.TIMEZONE}', timestamp)"
+    months = con.execute(f"""
+        SELECT DISTINCT CAST(date_trunc('month', {local}) AS DATE)
+        FROM reports
+        WHERE timestamp < ?
+        ORDER BY 1
+    """, [before]).fetchall()
+
+    archived = []
+    for (first_day,) in months:
+        month_start = clock.start_of_day(first_day)
+        month_end = clock.start_of_day((first_day + timedelta(days=31)).replace(day=1))
+        where = "timestamp >= ? AND timestamp < ?"
+        params = [month_start, min(month_end, before)]
+        first_id, last_id = con.execute(
+            f"SELECT MIN(report_id), MAX(report_id) FROM reports WHERE {where}", params
+        ).fetchone()
+
+        month = first_day.strftime("%Y-%m")
+        folder = os.path.join(directory, "reports", f"month={month}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"reports_{first_id}_{last_id}.parquet")
+        target = path.replace("'", "''")
+        # ממוין לפי זמן, כך שסטטיסטיקות ה-min/max של כל קבוצת שורות בקובץ צרות
+        rows = con.execute(f"""
+            COPY (SELECT * FROM reports WHERE {where} ORDER BY timestamp, report_id)
+            TO '{target}' (FORMAT parquet, COMPRESSION zstd)
+        """, params).fetchone()[0]
+        con.execute(f"DELETE FROM reports WHERE {where}", params)
+        con.execute("""
+            INSERT OR REPLACE INTO report_archive VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [month, path, rows, os.path.getsize(path), first_id, last_id, clock.now()])
+        archived.append((month, rows))
+
+    if archived:
+        db.refresh_reports_view(con)
+    return archived
+
+
+def remove_orphans(directory, archived_paths):
+    """מחיקת קבצי ארכיון שאינם רשומים ב-report_archive; מחזיר את מספרם
+
+    נשארים כאלה מהעברה שנכשלה לפני סוף הטרנזקציה, ואחרי איפוס הדיווחים.
+    """
+    keep = {os.path.abspath(path) for path in archived_paths}
+    removed = 0
+    for root, _, files in os.walk(os.path.join(directory, "reports")):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".parquet") and os.path.abspath(path) not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
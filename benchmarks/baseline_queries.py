@@ -0,0 +1,40 @@
+"""שאילתות שהאפליקציה כבר אינה מריצה - נקודות ההשוואה של בדיקות הביצועים
+
+HOURS_QUERY    - סיכום השעות ישירות מהדיווחים (הצמדה ב-ASOF JOIN), מלפני הטבלאות
+                 המחושבות מראש shift_hours ו-weekly_hours.
+TRACKING_QUERY - כל green_eyes בכל רענון של המעקב, מלפני שהמעקב החי (tracking.py)
+                 קורא רק את העדכונים החדשים.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries import paired_shifts_sql  # noqa: E402
+
+PAIRED_SHIFTS_SQL = paired_shifts_sql()
+
+# שאילתה לחישוב שעות עבודה - מקובצת לפי עובד בלבד, מחושבת ישירות מהדיווחים
+HOURS_QUERY = f"""
+SELECT
+    personal_id,
+    STRING_AGG(DISTINCT work_location, ', ' ORDER BY work_location) as work_locations,
+    COUNT(*) as total_shifts,
+    COUNT(*) FILTER (WHERE hours_worked IS NOT NULL) as completed_shifts,
+    ROUND(SUM(COALESCE(hours_worked, 0)), 2) as total_hours,
+    ROUND(AVG(hours_worked), 2) as avg_hours_per_shift,
+    MIN(start_date) as first_shift_date,
+    MAX(COALESCE(end_date, start_date)) as last_shift_date
+FROM ({PAIRED_SHIFTS_SQL})
+WHERE start_date >= ?
+AND start_date <= ?
+GROUP BY personal_id
+ORDER BY total_hours DESC
+"""
+
+TRACKING_QUERY = """
+SELECT personal_id, current_location, on_shift,
+       strftime(timestamp, '%d/%m/%Y %H:%M') as report_datetime
+FROM green_eyes
+ORDER BY timestamp DESC
+"""
@@ -0,0 +1,159 @@
+"""בדיקת חישוב משך המשמרות והחריגות: קורפוס מקרי קצה ומדידת קצב
+
+הקורפוס עובר דרך db.insert_reports (העדכון השוטף של shift_hours), דרך בנייה מחדש
+של shift_hours ודרך queries.shift_anomalies_query, ומושווה לתוצאות הצפויות. אחר כך
+נמדד קצב חישוב המשכים והחריגות על טבלת reports סינתטית גדולה. קוד יציאה 1 אם
+אחד ממקרי הקורפוס נכשל.
+
+הרצה:
+    python benchmarks/bench_durations.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import shift_hours  # noqa: E402
+from bench_pairing import build_reports  # noqa: E402
+from baseline_queries import PAIRED_SHIFTS_SQL  # noqa: E402
+from queries import ANOMALY_LABELS, shift_anomalies_query  # noqa: E402
+
+ISRAEL = ZoneInfo(db.TIMEZONE)
+
+
+def at(text):
+    return datetime.fromisoformat(text).replace(tzinfo=ISRAEL)
+
+
+# (תיאור, דיווחים [(סוג, זמן)], שעות צפויות לכל כניסה לפי הסדר, חריגות צפויות [(סוג, זמן)])
+CORPUS = [
+    ("משמרת באותו יום",
+     [("entry", "2026-09-01 08:00"), ("exit", "2026-09-01 16:00")],
+     [8.0], []),
+    ("מעבר חצות",
+     [("entry", "2026-09-01 22:00"), ("exit", "2026-09-02 06:00")],
+     [8.0], []),
+    ("משמרת של כמה ימים",
+     [("entry", "2026-09-01 08:00"), ("exit", "2026-09-03 10:00")],
+     [50.0], [("long_shift", "2026-09-01 08:00")]),
+    ("דיוק של שניות",
+     [("entry", "2026-09-01 08:00:00"), ("exit", "2026-09-01 08:30:45")],
+     [0.5125], []),
+    ("מעבר לשעון חורף - שעה נוספת",
+     [("entry", "2026-10-24 20:00"), ("exit", "2026-10-25 08:00")],
+     [13.0], []),
+    ("מעבר לשעון קיץ - שעה חסרה",
+     [("entry", "2026-03-26 22:00"), ("exit", "2026-03-27 06:00")],
+     [7.0], []),
+    ("יציאה שנשכחה וכניסה נוספת",
+     [("entry", "2026-09-01 08:00"), ("entry", "2026-09-02 08:00"), ("exit", "2026-09-02 16:00")],
+     [32.0, 8.0], [("overlapping_entry", "2026-09-01 08:00")]),
+    ("יציאה ללא כניסה",
+     [("exit", "2026-09-01 16:00"), ("entry", "2026-09-02 08:00"), ("exit", "2026-09-02 16:00"),
+      ("exit", "2026-09-02 17:00")],
+     [8.0], [("exit_without_entry", "2026-09-01 16:00"), ("exit_without_entry", "2026-09-02 17:00")]),
+    ("כניסה ללא יציאה",
+     [("entry", "2026-09-01 08:00")],
+     [None], [("missing_exit", "2026-09-01 08:00")]),
+]
+
+
+def make_report(report_type, personal_id, timestamp):
+    entry = report_type == "entry"
+    return {
+        "report_type": report_type,
+        "personal_id": personal_id,
+        "rahal": "ויסאם אסד",
+        "work_location": "משגב" if entry else None,
+        "replacing_who": None,
+        "replacement_person": None,
+        "reports_count": None if entry else 0,
+        "special_notes": None,
+        "timestamp": timestamp,
+        "start_date": timestamp.date() if entry else None,
+        "start_time": timestamp.time() if entry else None,
+        "end_date": None if entry else timestamp.date(),
+        "end_time": None if entry else timestamp.time(),
+    }
+
+
+def check_corpus():
+    """מחזיר רשימת כשלים; כל מקרה נשמר תחת מ.א משלו"""
+    con = db.connect(":memory:")
+    for number, (_, reports, _, _) in enumerate(CORPUS):
+        with db.transaction(con):
+            db.insert_reports(con, [make_report(kind, str(number), at(text)) for kind, text in reports])
+
+    def hours_by_case():
+        rows = con.execute(
+            "SELECT personal_id, hours_worked FROM shift_hours ORDER BY personal_id, entry_timestamp"
+        ).fetchall()
+        hours = {}
+        for personal_id, value in rows:
+            hours.setdefault(int(personal_id), []).append(None if value is None else round(value, 6))
+        return hours
+
+    incremental = hours_by_case()
+    with db.transaction(con):
+        shift_hours.rebuild(con)
+    rebuilt = hours_by_case()
+
+    anomalies = {}
+    query, params = shift_anomalies_query(at("2000-01-01 00:00"), datetime.now(ISRAEL) + timedelta(days=1))
+    kinds = {label: kind for kind, label in ANOMALY_LABELS.items()}
+    for personal_id, label, when, _ in con.execute(query, params).fetchall():
+        when = datetime.strptime(when, "%d/%m/%Y %H:%M").strftime("%Y-%m-%d %H:%M")
+        anomalies.setdefault(int(personal_id), []).append((kinds[label], when))
+
+    failures = []
+    for number, (name, reports, expected_hours, expected_anomalies) in enumerate(CORPUS):
+        expected_anomalies = sorted((kind, at(text).strftime("%Y-%m-%d %H:%M")) for kind, text in expected_anomalies)
+        for source, hours in (("incremental", incremental), ("rebuild", rebuilt)):
+            if hours.get(number, []) != expected_hours:
+                failures.append(f"{name} ({source}): {hours.get(number)} != {expected_hours}")
+        if sorted(anomalies.get(number, [])) != expected_anomalies:
+            failures.append(f"{name} (anomalies): {sorted(anomalies.get(number, []))} != {expected_anomalies}")
+    con.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="מספר הרצות לכל שאילתה (נמדד הזמן הטוב ביותר)")
+    args = parser.parse_args()
+
+    failures = check_corpus()
+    print(f"קורפוס מקרי קצה: {len(CORPUS) - len({f.split(' (')[0] for f in failures})}/{len(CORPUS)} מקרים תקינים")
+    for failure in failures:
+        print("  ", failure)
+
+    con = db.connect(":memory:")
+    durations = f"SELECT COUNT(*), SUM(hours_worked) FROM ({PAIRED_SHIFTS_SQL})"
+    print(f"{'rows':>10} {'durations [s]':>14} {'rows/s':>12} {'anomalies [s]':>14} {'rows/s':>12}")
+    for size in args.sizes:
+        build_reports(con, size, args.employees)
+        query, params = shift_anomalies_query(at("2000-01-01 00:00"), datetime.now(ISRAEL))
+        timings = []
+        for sql, sql_params in ((durations, None), (query, params)):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                con.execute(sql, sql_params).fetchall()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+        print(f"{size:>10} {timings[0]:>14.3f} {size / timings[0]:>12,.0f} {timings[1]:>14.3f} {size / timings[1]:>12,.0f}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
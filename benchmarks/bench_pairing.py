@@ -0,0 +1,163 @@
+"""השוואת זמני ריצה: הצמדת כניסה-יציאה הישנה מול HOURS_QUERY (ב-ASOF JOIN)
+
+הרצה:
+    python benchmarks/bench_pairing.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+from baseline_queries import HOURS_QUERY  # noqa: E402
+
+# השאילתה הקודמת - שתי תת-שאילתות מתואמות לכל שורת כניסה
+LEGACY_HOURS_QUERY = """
+WITH entry_exits AS (
+    SELECT
+        e.personal_id,
+        e.work_location,
+        e.start_date,
+        e.start_time,
+        e.timestamp as entry_time,
+        (SELECT x.end_date FROM reports x
+         WHERE x.personal_id = e.personal_id
+         AND x.report_type = 'exit'
+         AND x.timestamp > e.timestamp
+         ORDER BY x.timestamp LIMIT 1) as end_date,
+        (SELECT x.end_time FROM reports x
+         WHERE x.personal_id = e.personal_id
+         AND x.report_type = 'exit'
+         AND x.timestamp > e.timestamp
+         ORDER BY x.timestamp LIMIT 1) as end_time
+    FROM reports e
+    WHERE e.report_type = 'entry'
+    AND DATE(e.start_date) >= ?
+    AND DATE(e.start_date) <= ?
+),
+calculated_hours AS (
+    SELECT
+        personal_id,
+        work_location,
+        start_date,
+        start_time,
+        end_date,
+        end_time,
+        CASE
+            WHEN start_time IS NOT NULL AND end_time IS NOT NULL
+            AND start_date IS NOT NULL AND end_date IS NOT NULL THEN
+                CASE
+                    WHEN start_date = end_date THEN
+                        (EXTRACT('hour' FROM CAST(end_time AS TIME)) * 60 + EXTRACT('minute' FROM CAST(end_time AS TIME))) -
+                        (EXTRACT('hour' FROM CAST(start_time AS TIME)) * 60 + EXTRACT('minute' FROM CAST(start_time AS TIME)))
+                    ELSE
+                        (24 * 60) - (EXTRACT('hour' FROM CAST(start_time AS TIME)) * 60 + EXTRACT('minute' FROM CAST(start_time AS TIME))) +
+                        (EXTRACT('hour' FROM CAST(end_time AS TIME)) * 60 + EXTRACT('minute' FROM CAST(end_time AS TIME)))
+                END / 60.0
+            ELSE NULL
+        END as hours_worked
+    FROM entry_exits
+)
+SELECT
+    personal_id,
+    STRING_AGG(DISTINCT work_location, ', ') as work_locations,
+    COUNT(*) as total_shifts,
+    COUNT(*) FILTER (WHERE hours_worked IS NOT NULL) as completed_shifts,
+    ROUND(SUM(COALESCE(hours_worked, 0)), 2) as total_hours,
+    ROUND(AVG(hours_worked), 2) as avg_hours_per_shift,
+    MIN(start_date) as first_shift_date,
+    MAX(COALESCE(end_date, start_date)) as last_shift_date
+FROM calculated_hours
+GROUP BY personal_id
+ORDER BY total_hours DESC
+"""
+
+
+def build_reports(con, size, employees):
+    """מילוי טבלת reports סינתטית: כניסה ויציאה לסירוגין, כ-5% יציאות חסרות"""
+    con.execute("DELETE FROM reports")
+    con.execute(f"""
+    INSERT INTO reports ({", ".join(db.REPORT_COLUMNS)})
+    WITH raw AS (
+        SELECT
+            i,
+            CAST(1000 + i % {employees} AS TEXT) AS personal_id,
+            i // {employees} AS k,
+            TIMESTAMP '2024-01-07 06:00:00'
+                + to_minutes(CAST((i // {employees}) // 2 * 720 + (i // {employees}) % 2 * (240 + hash(i) % 480) + i % {employees} AS BIGINT))
+                + to_microseconds(CAST(hash(i * 7) % 1000000 AS BIGINT)) AS ts
+        FROM range({size}) t(i)
+    )
+    SELECT
+        CASE WHEN k % 2 = 0 THEN 'entry' ELSE 'exit' END AS report_type,
+        personal_id,
+        'ויסאם אסד' AS rahal,
+        CASE WHEN k % 2 = 0 THEN ['משגב', 'צניפים', 'ג''וליס'][1 + i % 3] END AS work_location,
+        'לא הועברה חפיפה' AS replacing_who,
+        'לא הועברה חפיפה' AS replacement_person,
+        CASE WHEN k % 2 = 1 THEN CAST(i % 10 AS INTEGER) END AS reports_count,
+        NULL::TEXT AS special_notes,
+        timezone('{db.TIMEZONE}', ts) AS timestamp,
+        CASE WHEN k % 2 = 0 THEN CAST(ts AS DATE) END AS start_date,
+        CASE WHEN k % 2 = 0 THEN CAST(date_trunc('second', ts) AS TIME) END AS start_time,
+        CASE WHEN k % 2 = 1 THEN CAST(ts AS DATE) END AS end_date,
+        CASE WHEN k % 2 = 1 THEN CAST(date_trunc('second', ts) AS TIME) END AS end_time
+    FROM raw
+    WHERE NOT (k % 2 = 1 AND hash(i) % 20 = 0)
+    ORDER BY ts
+    """)
+    return con.execute("SELECT MIN(start_date), MAX(start_date) FROM reports").fetchone()
+
+
+def timed(con, query, params, timeout, repeat):
+    """הרצת שאילתה עם מגבלת זמן; מחזיר (הזמן הטוב ביותר בשניות, תוצאות) או (None, None) בחריגה"""
+    best, rows = None, None
+    for _ in range(repeat):
+        timer = threading.Timer(timeout, con.interrupt)
+        timer.start()
+        started = time.perf_counter()
+        try:
+            rows = con.execute(query, params).fetchall()
+        except duckdb.InterruptException:
+            return None, None
+        finally:
+            timer.cancel()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def normalized(rows):
+    """השוואת ההצמדה בלבד: סדר המיקומים ב-STRING_AGG של השאילתה הישנה אינו קבוע ולכן ממוין,
+    ועמודות השעות מושמטות - השאילתה הישנה מחשבת אותן משעות מעוגלות לדקה"""
+    return sorted((r[0], ", ".join(sorted(r[1].split(", "))), r[2], r[3], *r[6:]) for r in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=300.0, help="מגבלת זמן לשאילתה בשניות")
+    parser.add_argument("--repeat", type=int, default=3, help="מספר הרצות לכל שאילתה (נמדד הזמן הטוב ביותר)")
+    args = parser.parse_args()
+
+    con = db.connect(":memory:")
+    print(f"{'rows':>10} {'legacy [s]':>12} {'asof [s]':>10} {'speedup':>8}  same")
+    for size in args.sizes:
+        params = build_reports(con, size, args.employees)
+        new_time, new_rows = timed(con, HOURS_QUERY, params, args.timeout, args.repeat)
+        old_time, old_rows = timed(con, LEGACY_HOURS_QUERY, params, args.timeout, args.repeat)
+        if old_time is None:
+            print(f"{size:>10} {'>' + str(args.timeout):>12} {new_time:>10.3f} {'-':>8}  -")
+            continue
+        same = normalized(old_rows) == normalized(new_rows)
+        print(f"{size:>10} {old_time:>12.3f} {new_time:>10.3f} {old_time / new_time:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""מדידת שאילתות דפי הניהול וקצב השמירה מול מסד נתונים קיים, עם פלט JSON
+
+רץ מול קובץ מסד נתונים (למשל כזה שנוצר ב-generate_data.py): שאילתות סיכום
+השעות, המעקב וכל הדיווחים עם הפרמטרים שדפי הניהול שולחים, ושמירת מנות דיווחים
+ועדכוני מיקום כמו בתור ההגשות. הטווחים נקבעים לפי הדיווח האחרון שבקובץ, כך
+שהרצות על אותו קובץ ניתנות להשוואה בכל יום. המנות נשמרות בטרנזקציה שמבוטלת
+בסופה, והקובץ לא משתנה.
+
+ה-JSON נכתב ל-stdout (או לקובץ ב---output) והטבלה ל-stderr. עם --baseline
+מושווה כל מדידה לקובץ JSON קודם, וקוד היציאה 1 אם אחת מהן האטה יותר מ---max-slowdown.
+
+הרצה:
+    python benchmarks/generate_data.py --db /tmp/bench.db
+    python benchmarks/bench_queries.py --db /tmp/bench.db > before.json
+    python benchmarks/bench_queries.py --db /tmp/bench.db --baseline before.json > after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clock  # noqa: E402
+import db  # noqa: E402
+import submissions  # noqa: E402
+from baseline_queries import HOURS_QUERY, TRACKING_QUERY  # noqa: E402
+from queries import (  # noqa: E402
+    WEEKLY_HOURS_QUERY, NOT_REPORTED_QUERY, TRACKING_AS_OF_QUERY,
+    NOT_REPORTED_AS_OF_QUERY, TRACKING_STATE_QUERY, TRACKING_CHANGES_QUERY, FILTER_VALUES_QUERY, PAGE_SIZE, REPORTS_ALL, hours_by_period_query,
+    shift_anomalies_query, all_reports_page_query, all_reports_summary_query,
+)
+
+TABLES = ("reports", REPORTS_ALL, "shift_hours", "weekly_hours", "green_eyes_history", "green_eyes", "roster")
+
+# כמה עמודים לדלג בבדיקת עמוד עמוק בכל הדיווחים
+DEEP_PAGE = 100
+
+# מספר עדכוני המיקום החדשים בבדיקת הרענון של המעקב החי
+TRACKING_CHANGES = 100
+
+
+def no_filters(**filters):
+    return {
+        "report_type": None, "rahal": None, "work_location": None,
+        "personal_id": None, "date_from": None, "date_to": None,
+        **filters,
+    }
+
+
+def query_cases(database):
+    """(שם, שאילתה, פרמטרים) לכל בדיקה, לפי הנתונים שבקובץ"""
+    last, busiest = database.read(f"""
+        SELECT max(timestamp), mode(personal_id ORDER BY personal_id) FROM {REPORTS_ALL}
+    """)[0]
+    if last is None:
+        raise SystemExit("אין דיווחים במסד הנתונים - יש למלא אותו קודם, למשל ב-generate_data.py")
+    last_day = last.astimezone(clock.ISRAEL).date()
+    week_start = last_day - timedelta(days=(last_day.weekday() + 1) % 7)
+    month_start = last_day - timedelta(days=30)
+    year_start = last_day - timedelta(days=365)
+    as_of = clock.start_of_day(last_day - timedelta(days=7)) + timedelta(hours=14)
+    month = no_filters(date_from=clock.start_of_day(month_start), date_to=clock.start_of_day(last_day + timedelta(days=1)))
+    employee = no_filters(personal_id=busiest)
+
+    # מפתח העמוד ה-DEEP_PAGE, כמו אחרי לחיצות חוזרות על "הבא"
+    deep_after = database.read(f"""
+        SELECT timestamp, report_id FROM {REPORTS_ALL}
+        ORDER BY timestamp DESC NULLS LAST, report_id DESC
+        LIMIT 1 OFFSET {DEEP_PAGE * PAGE_SIZE - 1}
+    """)
+    deep_after = deep_after[0] if deep_after else None
+    last_event = database.read("SELECT COALESCE(MAX(event_id), 0) FROM green_eyes_history")[0][0]
+
+    return [
+        ("weekly_hours", WEEKLY_HOURS_QUERY, [week_start]),
+        ("hours_asof_month", HOURS_QUERY, [month_start, last_day]),
+        ("hours_by_week_quarter", hours_by_period_query("week"), [last_day - timedelta(days=90), last_day]),
+        ("hours_by_month_year", hours_by_period_query("month"), [year_start, last_day]),
+        ("shift_anomalies_month", *shift_anomalies_query(month["date_from"], month["date_to"])),
+        ("tracking", TRACKING_QUERY, None),
+        ("tracking_state", TRACKING_STATE_QUERY, None),
+        ("tracking_changes", TRACKING_CHANGES_QUERY, [max(last_event - TRACKING_CHANGES, 0)]),
+        ("not_reported", NOT_REPORTED_QUERY, None),
+        ("tracking_as_of", TRACKING_AS_OF_QUERY, [as_of]),
+        ("not_reported_as_of", NOT_REPORTED_AS_OF_QUERY, [as_of]),
+        ("filter_values", FILTER_VALUES_QUERY, None),
+        ("all_reports_summary", *all_reports_summary_query(no_filters())),
+        ("all_reports_summary_month", *all_reports_summary_query(month)),
+        ("all_reports_page_first", *all_reports_page_query(no_filters(), limit=PAGE_SIZE + 1)),
+        ("all_reports_page_deep", *all_reports_page_query(no_filters(), after=deep_after, limit=PAGE_SIZE + 1)),
+        ("all_reports_page_employee", *all_reports_page_query(employee, limit=PAGE_SIZE + 1)),
+    ]
+
+
+def measure(run, repeat):
+    """הרצת run כמה פעמים; מחזיר את הזמנים בשניות ואת תוצאת ההרצה האחרונה"""
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def summarize(timings, **extra):
+    return {
+        "best_ms": min(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        **extra,
+    }
+
+
+def make_report(index, timestamp):
+    entry = index % 2 == 0
+    return {
+        "report_type": "entry" if entry else "exit",
+        "personal_id": f"{9000 + index // 2 % 500}",
+        "rahal": "ויסאם אסד",
+        "work_location": "משגב" if entry else None,
+        "replacing_who": "לא הועברה חפיפה",
+        "replacement_person": "לא הועברה חפיפה",
+        "reports_count": None if entry else index % 10,
+        "special_notes": None,
+        "timestamp": timestamp,
+        # נגזרים מ-timestamp ב-db.insert_reports
+        "start_date": None, "start_time": None, "end_date": None, "end_time": None,
+    }
+
+
+def make_location(index, timestamp):
+    return {
+        "personal_id": f"{9000 + index % 500}",
+        "current_location": "משגב",
+        "on_shift": "כן",
+        "timestamp": timestamp,
+    }
+
+
+def insert_case(database, apply, make_row, count, batch_size, repeat):
+    """שמירת count שורות במנות של batch_size, כל מנה בטרנזקציה שמבוטלת בסופה"""
+    start = clock.now() + timedelta(days=1)
+    rows = [make_row(index, start + timedelta(minutes=index)) for index in range(count)]
+    cursor = database.cursor()
+
+    def run():
+        for first in range(0, count, batch_size):
+            cursor.begin()
+            try:
+                apply(cursor, rows[first:first + batch_size])
+            finally:
+                cursor.rollback()
+
+    timings, _ = measure(run, repeat)
+    return summarize(timings, rows=count, rows_per_second=count / statistics.median(timings))
+
+
+def run_benchmarks(args):
+    database = db.ConnectionManager(args.db)
+    try:
+        results = {}
+        for name, query, params in query_cases(database):
+            # הרצה ראשונה לחימום, כמו בדף ניהול שכבר נפתח
+            database.read(query, params)
+            timings, rows = measure(lambda: database.read(query, params), args.repeat)
+            results[name] = summarize(timings, rows=len(rows))
+
+        results["insert_reports"] = insert_case(
+            database, db.insert_reports, make_report, args.inserts, args.batch_size, args.repeat
+        )
+        results["upsert_locations"] = insert_case(
+            database, db.upsert_locations, make_location, args.inserts, args.batch_size, args.repeat
+        )
+        meta = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "db": os.path.abspath(args.db),
+            "db_bytes": os.path.getsize(args.db),
+            "rows": {table: database.read(f"SELECT COUNT(*) FROM {table}")[0][0] for table in TABLES},
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        }
+    finally:
+        database.close()
+    return {"meta": meta, "results": results}
+
+
+def compare(report, baseline, max_slowdown):
+    """הוספת היחס לזמן החציוני שבקובץ הבסיס; מחזיר את שמות המדידות שהאטו"""
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        result["baseline_median_ms"] = before["median_ms"]
+        result["ratio"] = result["median_ms"] / before["median_ms"]
+        if result["ratio"] > max_slowdown:
+            regressions.append(name)
+    return regressions
+
+
+def print_table(report, out):
+    print(f"{'benchmark':<28} {'best [ms]':>10} {'median [ms]':>12} {'rows':>8} {'vs base':>8}", file=out)
+    for name, result in report["results"].items():
+        ratio = f"{result['ratio']:.2f}x" if "ratio" in result else "-"
+        print(f"{name:<28} {result['best_ms']:>10.2f} {result['median_ms']:>12.2f} {result['rows']:>8} {ratio:>8}",
+              file=out)
+    for name in ("insert_reports", "upsert_locations"):
+        print(f"{name}: {report['results'][name]['rows_per_second']:,.0f} rows/s", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=db.DB_PATH, help="נתיב קובץ מסד הנתונים")
+    parser.add_argument("--repeat", type=int, default=5, help="מספר הרצות לכל מדידה (אחרי הרצת חימום)")
+    parser.add_argument("--inserts", type=int, default=1000, help="מספר השורות בבדיקות השמירה")
+    parser.add_argument("--batch-size", type=int, default=submissions.BATCH_SIZE)
+    parser.add_argument("--output", default="-", help="קובץ ה-JSON (ברירת מחדל stdout)")
+    parser.add_argument("--baseline", help="קובץ JSON מהרצה קודמת להשוואה")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="יחס זמן חציוני מעל קובץ הבסיס שנחשב רגרסיה")
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} לא קיים - אפשר ליצור אותו ב-generate_data.py")
+
+    report = run_benchmarks(args)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.max_slowdown)
+        report["regressions"] = regressions
+
+    print_table(report, sys.stderr)
+    if args.output == "-":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+    if regressions:
+        print(f"האטה מעל x{args.max_slowdown}: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""בדיקת טבלאות הסיכום של הניתוח התפעולי ומדידת זמני הקריאה מהן
+
+בדיקה: נתונים סינתטיים קטנים (generate_data.py) נשמרים מחדש דרך db.insert_reports
+במנות כמו בתור ההגשות, וטבלאות הסיכום שהתעדכנו תוך כדי מושוות לבנייה מחדש שלהן.
+קוד יציאה 1 אם יש הבדל.
+
+מדידה (עם --db): שאילתות לשונית הניתוח מול טבלאות הסיכום, לעומת חישוב אותם
+סיכומים ישירות מ-shift_hours ומהדיווחים, ועדכון הסיכומים למנה אחת של דיווחים.
+
+הרצה:
+    python benchmarks/bench_rollups.py --db /tmp/bench.db
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clock  # noqa: E402
+import db  # noqa: E402
+import generate_data  # noqa: E402
+import rollups  # noqa: E402
+import submissions  # noqa: E402
+from queries import LOCATION_LOAD_QUERY, RAHAL_WEEKLY_QUERY, REPORTS_ALL  # noqa: E402
+
+ROLLUP_ORDER = {
+    "location_hourly": "day, hour, work_location",
+    "rahal_weekly": "week_start, rahal",
+}
+
+
+def snapshot(con):
+    """תוכן טבלאות הסיכום, מעוגל כדי שסדר החיבור לא ייצור הבדלים"""
+    return {
+        table: [
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in con.execute(f"SELECT * FROM {table} ORDER BY {order}").fetchall()
+        ]
+        for table, order in ROLLUP_ORDER.items()
+    }
+
+
+def check_incremental(employees, days):
+    """מחזיר רשימת הבדלים בין העדכון השוטף לבנייה מחדש"""
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.db")
+        generate_data.main(["--db", source, "--employees", str(employees), "--days", str(days)])
+        con = db.connect(source)
+        columns = ", ".join(db.REPORT_COLUMNS)
+        reports = [
+            dict(zip(db.REPORT_COLUMNS, row))
+            for row in con.execute(f"SELECT {columns} FROM reports ORDER BY timestamp, report_id").fetchall()
+        ]
+        con.close()
+
+        con = db.connect(os.path.join(directory, "replay.db"))
+        for first in range(0, len(reports), submissions.BATCH_SIZE):
+            with db.transaction(con):
+                db.insert_reports(con, reports[first:first + submissions.BATCH_SIZE])
+        incremental = snapshot(con)
+        with db.transaction(con):
+            rollups.rebuild(con)
+        rebuilt = snapshot(con)
+        con.close()
+
+    differences = []
+    for table in ROLLUP_ORDER:
+        missing = set(rebuilt[table]) - set(incremental[table])
+        extra = set(incremental[table]) - set(rebuilt[table])
+        differences += [f"{table} חסר: {row}" for row in sorted(missing, key=str)[:5]]
+        differences += [f"{table} מיותר: {row}" for row in sorted(extra, key=str)[:5]]
+    print(f"{len(reports)} דיווחים, {len(incremental['location_hourly'])} שורות location_hourly, "
+          f"{len(incremental['rahal_weekly'])} שורות rahal_weekly")
+    return differences
+
+
+def best_of(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def measure(path, repeat):
+    database = db.ConnectionManager(path)
+    try:
+        last = database.read(f"SELECT max(end_date) FROM {REPORTS_ALL}")[0][0]
+        first = database.read(f"SELECT min(start_date) FROM {REPORTS_ALL}")[0][0]
+        ranges = {"8 weeks": last - timedelta(weeks=8), "all": first}
+        print(f"{'query':<28} {'range':<8} {'rollup [ms]':>12} {'ad hoc [ms]':>12}")
+        for name, range_start in ranges.items():
+            rollup = best_of(lambda: database.read(LOCATION_LOAD_QUERY, [range_start, last]), repeat)
+            ad_hoc = best_of(lambda: database.read(
+                f"SELECT work_location, hour, SUM(staffed_hours) FROM ({rollups.COVERAGE_SQL.format(where='', bucket_where='')}) "
+                "WHERE day BETWEEN ? AND ? GROUP BY ALL", [range_start, last]
+            ), repeat)
+            print(f"{'location_load':<28} {name:<8} {rollup:>12.2f} {ad_hoc:>12.2f}")
+            rollup = best_of(lambda: database.read(RAHAL_WEEKLY_QUERY, [range_start, last]), repeat)
+            ad_hoc = best_of(lambda: database.read(
+                f"SELECT * FROM ({rollups.RAHAL_SQL.format(where='')}) WHERE week_start BETWEEN ? AND ?",
+                [range_start, last]
+            ), repeat)
+            print(f"{'rahal_weekly':<28} {name:<8} {rollup:>12.2f} {ad_hoc:>12.2f}")
+
+        # העדכון שמנת דיווחים אחת מוסיפה: יציאות של היום האחרון, בטרנזקציה שמבוטלת
+        exit_time = clock.start_of_day(last) + timedelta(hours=20)
+        days, weeks = set(), set()
+        for rahal in database.read("SELECT DISTINCT rahal FROM rahal_weekly"):
+            report = {"report_type": "exit", "timestamp": exit_time, "rahal": rahal[0]}
+            report_days, report_weeks = rollups.affected(report)
+            days |= report_days
+            weeks |= report_weeks
+        cursor = database.cursor()
+
+        def refresh():
+            cursor.begin()
+            try:
+                rollups.refresh(cursor, days, weeks)
+            finally:
+                cursor.rollback()
+
+        print(f"refresh for one batch ({len(days)} days, {len(weeks)} rahal weeks): {best_of(refresh, repeat):.2f} ms")
+    finally:
+        database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="קובץ מסד נתונים למדידה (למשל מ-generate_data.py)")
+    parser.add_argument("--employees", type=int, default=20, help="עובדים בבדיקת העדכון השוטף")
+    parser.add_argument("--days", type=int, default=60, help="ימים בבדיקת העדכון השוטף")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    differences = check_incremental(args.employees, args.days)
+    print(f"עדכון שוטף מול בנייה מחדש: {'זהים' if not differences else f'{len(differences)} הבדלים'}")
+    for difference in differences:
+        print("  ", difference)
+
+    if args.db:
+        measure(args.db, args.repeat)
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
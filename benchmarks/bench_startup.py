@@ -0,0 +1,85 @@
+"""זמני עלייה והרצה חוזרת של האפליקציה לכל עמוד
+
+כל עמוד נמדד בתהליך חדש (דרך streamlit.testing), מול מסד נתונים שכבר עבר את
+המיגרציות כמו בהפעלה מחדש של השרת: ההרצה הראשונה כוללת את כל הייבוא ופתיחת
+מסד הנתונים, ואחריה נמדדות הרצות חוזרות כמו בכל לחיצה בעמוד. מודפס גם אם
+pandas נטען - בעמודי העובדים הוא לא אמור להיטען.
+
+הרצה:
+    python benchmarks/bench_startup.py --reruns 20
+    python benchmarks/bench_startup.py --app path/to/other_shift.py   # להשוואה מול גרסה אחרת
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+
+PAGES = ["דוח משמרת", "היכן אני כעת", "ADMIN"]
+
+
+def measure(app, page, reruns):
+    """רץ בתהליך הבן: הרצה ראשונה והרצות חוזרות של עמוד אחד"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=120)
+    # בחירת העמוד וכניסה לדף הניהול לפני ההרצה הראשונה
+    at.session_state["page"] = page
+    at.session_state["access_granted"] = True
+    at.run()
+    cold = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    return {
+        "page": page,
+        "cold": cold,
+        "rerun": statistics.median(timings),
+        "pandas": "pandas" in sys.modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "shift.py"))
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(os.path.abspath(args.app), args.child, args.reruns)))
+        return
+
+    print(f"{'page':<14} {'cold [ms]':>10} {'rerun [ms]':>11}  pandas")
+    with tempfile.TemporaryDirectory() as directory:
+        env = {**os.environ, "PYTHONPATH": ROOT}
+        for page in PAGES:
+            # כל עמוד בתהליך חדש ובתיקייה משלו (מסד נתונים ותור הגשות ריקים)
+            workdir = os.path.join(directory, str(PAGES.index(page)))
+            os.makedirs(workdir)
+            db.connect(os.path.join(workdir, db.DB_PATH)).close()
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--app", os.path.abspath(args.app),
+                 "--reruns", str(args.reruns), "--child", page],
+                cwd=workdir, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{page:<14} {result['cold'] * 1000:>10.0f} {result['rerun'] * 1000:>11.1f}  {result['pandas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""מחולל נתונים סינתטיים: שנה של דיווחי משמרות ועדכוני היכן אני כעת
+
+ממלא קובץ מסד נתונים (כולל כל המיגרציות) בזוגות כניסה-יציאה לכל עובד, עם
+משמרות לילה שעוברות את חצות, יציאות חסרות ומשמרות ארוכות, עדכוני היכן אני
+כעת בזמן המשמרות ורשימת עובדים שחלק ממנה לא דיווח מעולם. shift_hours,
+weekly_hours וטבלאות הסיכום נבנים מהדיווחים כמו ב-manage.py rebuild-shift-hours.
+
+הנתונים נחתכים בזמן ההרצה, כמו מסד נתונים אמיתי שנלקח באותו רגע: משמרות שטרם
+התחילו אינן נכנסות, משמרת שעדיין נמשכת נשארת פתוחה (ללא יציאה), ועדכוני היכן
+אני כעת מאוחרים יותר נשמטים. משמרות הלילה של --end (ברירת מחדל היום) מסתיימות
+רק למחרת, ולכן בלי החיתוך היו נכנסים דיווחים ועדכונים מהעתיד.
+
+מלבד החיתוך, הנתונים נגזרים מ-hash של (עובד, יום, seed) ולכן זהים בכל הרצה עם
+אותם פרמטרים.
+הכול רץ בשאילתות SQL בתוך DuckDB, ללא רשת.
+
+הרצה:
+    python benchmarks/generate_data.py --db /tmp/bench.db --employees 300 --days 365
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clock  # noqa: E402
+import db  # noqa: E402
+import rollups  # noqa: E402
+import shift_hours  # noqa: E402
+
+RAHALS = ["ויסאם אסד", "יובל שטפל", "דניאל הנו", "נזיה הנו", "אסף גבור", "נתי שיינפלד"]
+LOCATIONS = ["משגב", "צניפים", "ג'וליס"]
+FIRST_PERSONAL_ID = 1000
+
+
+def sql_list(values):
+    return "[" + ", ".join("'" + value.replace("'", "''") + "'" for value in values) + "]"
+
+
+def insert_with_ids(con, table, id_column, sequence, columns, select_sql, params=None):
+    """הוספת השורות לפי סדר הזמן, עם מזהים רציפים מהרצף של הטבלה
+
+    ברירת המחדל nextval אינה מבטיחה שהמזהים יוקצו לפי ORDER BY, ולכן המזהים
+    מחושבים כאן והרצף מקודם אחר כך במספר השורות שנוספו.
+    """
+    first_id = con.execute(f"SELECT nextval('{sequence}')").fetchone()[0]
+    con.execute(f"""
+        INSERT INTO {table} ({id_column}, {", ".join(columns)})
+        SELECT {first_id} - 1 + row_number() OVER (ORDER BY timestamp), {", ".join(columns)}
+        FROM ({select_sql})
+        ORDER BY timestamp
+    """, params)
+    count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if count > 1:
+        con.execute(f"SELECT max(nextval('{sequence}')) FROM range({count - 1})")
+    return count
+
+
+def shifts_sql(args):
+    """שורה לכל משמרת: עובד, מיקום, זמן כניסה ויציאה מקומיים (יציאה NULL אם חסרה)"""
+    first_day = args.end - timedelta(days=args.days - 1)
+    # מספר פסאודו-אקראי קבוע בטווח [0, 1) לכל (עובד, יום, שימוש)
+    def rnd(use, day="d"):
+        return f"(hash(e, {day}, {use}, {args.seed}) % 1000000) / 1000000.0"
+    return f"""
+    WITH days AS (
+        SELECT e, d,
+               DATE '{first_day}' + CAST(d AS INTEGER) AS day,
+               {rnd(0, 0)} < {args.night_rate} AS night_worker,
+               {rnd(1)} AS r_start,
+               {rnd(2)} AS r_length,
+               {rnd(3)} AS r_missing,
+               {rnd(4)} AS r_long,
+               {rnd(5)} AS r_location
+        FROM range({args.employees}) t(e), range({args.days}) s(d)
+        WHERE {rnd(6)} < {args.work_rate}
+    ),
+    shifts AS (
+        SELECT e, d, r_missing,
+               CASE WHEN r_location < 0.9
+                    THEN {sql_list(LOCATIONS)}[1 + e % {len(LOCATIONS)}]
+                    ELSE {sql_list(LOCATIONS)}[1 + d % {len(LOCATIONS)}] END AS work_location,
+               day + CASE WHEN night_worker THEN INTERVAL 21 HOUR ELSE INTERVAL 6 HOUR END
+                   + to_seconds(CAST(r_start * 3 * 3600 AS BIGINT)) AS entry_local,
+               CASE WHEN r_long < {args.long_shift_rate}
+                    THEN to_seconds(CAST((17 + r_length * 3) * 3600 AS BIGINT))
+                    ELSE to_seconds(CAST((7.5 + r_length * 2.5) * 3600 AS BIGINT)) END AS length
+        FROM days
+    )
+    SELECT CAST({FIRST_PERSONAL_ID} + e AS VARCHAR) AS personal_id,
+           {sql_list(RAHALS)}[1 + e % {len(RAHALS)}] AS rahal,
+           work_location,
+           timezone('{db.TIMEZONE}', entry_local) AS entry_timestamp,
+           CASE WHEN r_missing >= {args.missing_exit_rate}
+                THEN timezone('{db.TIMEZONE}', entry_local + length) END AS exit_timestamp,
+           length,
+           e, d
+    FROM shifts
+    """
+
+
+def generate(con, args):
+    """מילוי reports, היכן אני כעת ורשימת העובדים (יש לקרוא בתוך טרנזקציה)"""
+    con.execute(f"CREATE TEMP TABLE generated_shifts AS {shifts_sql(args)}")
+    captured_at = clock.now()
+    con.execute("DELETE FROM generated_shifts WHERE entry_timestamp > ?", [captured_at])
+    con.execute("UPDATE generated_shifts SET exit_timestamp = NULL WHERE exit_timestamp > ?", [captured_at])
+
+    # דיווחי כניסה ויציאה - שדות התאריך והשעה נגזרים מהזמן כמו ב-clock.report_times
+    insert_with_ids(con, "reports", "report_id", "reports_id_seq", db.REPORT_COLUMNS, f"""
+        SELECT 'entry' AS report_type, personal_id, rahal, work_location,
+               'לא הועברה חפיפה' AS replacing_who, 'לא הועברה חפיפה' AS replacement_person,
+               NULL::INTEGER AS reports_count, NULL::VARCHAR AS special_notes,
+               entry_timestamp AS timestamp,
+               CAST(timezone('{db.TIMEZONE}', entry_timestamp) AS DATE) AS start_date,
+               CAST(date_trunc('second', timezone('{db.TIMEZONE}', entry_timestamp)) AS TIME) AS start_time,
+               NULL::DATE AS end_date, NULL::TIME AS end_time
+        FROM generated_shifts
+        UNION ALL
+        SELECT 'exit', personal_id, rahal, NULL, NULL, 'לא הועברה חפיפה',
+               CAST(hash(e, d, {args.seed}) % 10 AS INTEGER),
+               CASE WHEN hash(e, d, 7, {args.seed}) % 50 = 0 THEN 'ללא אירועים חריגים' END,
+               exit_timestamp,
+               NULL, NULL,
+               CAST(timezone('{db.TIMEZONE}', exit_timestamp) AS DATE),
+               CAST(date_trunc('second', timezone('{db.TIMEZONE}', exit_timestamp)) AS TIME)
+        FROM generated_shifts
+        WHERE exit_timestamp IS NOT NULL
+    """)
+
+    # עדכוני היכן אני כעת: כמה עדכונים בזמן כל משמרת, ולפעמים עדכון מהבית אחריה
+    insert_with_ids(con, "green_eyes_history", "event_id", "green_eyes_event_seq", db.LOCATION_COLUMNS, f"""
+        SELECT * FROM (
+            SELECT personal_id, work_location AS current_location, 'כן' AS on_shift,
+                   entry_timestamp + to_seconds(CAST(
+                       epoch(length) * (u + (hash(e, d, u, {args.seed}) % 1000) / 1000.0) / {args.location_updates}
+                   AS BIGINT)) AS timestamp
+            FROM generated_shifts, range({args.location_updates}) t(u)
+            UNION ALL
+            SELECT personal_id, 'בית', 'לא', exit_timestamp + INTERVAL 1 HOUR
+            FROM generated_shifts
+            WHERE exit_timestamp IS NOT NULL AND hash(e, d, 8, {args.seed}) % 10 < 3
+        )
+        WHERE timestamp <= ?
+    """, [captured_at])
+    con.execute("""
+        INSERT INTO green_eyes (personal_id, current_location, on_shift, timestamp)
+        SELECT personal_id, arg_max(current_location, event_id), arg_max(on_shift, event_id), max(timestamp)
+        FROM green_eyes_history
+        GROUP BY personal_id
+        ORDER BY max(timestamp)
+    """)
+
+    # רשימת העובדים, כולל עובדים שלא דיווחו מעולם
+    con.execute("DELETE FROM roster")
+    con.execute(f"""
+        INSERT INTO roster
+        SELECT CAST({FIRST_PERSONAL_ID} + e AS VARCHAR), 'עובד ' || ({FIRST_PERSONAL_ID} + e),
+               {sql_list(RAHALS)}[1 + e % {len(RAHALS)}],
+               [{sql_list(LOCATIONS)}[1 + e % {len(LOCATIONS)}]]
+        FROM range({args.employees + args.absent}) t(e)
+    """)
+    con.execute("DROP TABLE generated_shifts")
+
+
+def counts(con):
+    return {
+        table: con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("reports", "shift_hours", "weekly_hours", "location_hourly", "rahal_weekly",
+                      "green_eyes_history", "green_eyes", "roster")
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=db.DB_PATH, help="נתיב קובץ מסד הנתונים")
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--end", type=date.fromisoformat, default=clock.today(),
+                        help="היום האחרון בנתונים (YYYY-MM-DD), ברירת מחדל היום - עד זמן ההרצה")
+    parser.add_argument("--work-rate", type=float, default=5 / 7, help="חלק הימים שבהם עובד עובד")
+    parser.add_argument("--night-rate", type=float, default=0.25, help="חלק העובדים במשמרות לילה (עוברות את חצות)")
+    parser.add_argument("--missing-exit-rate", type=float, default=0.02)
+    parser.add_argument("--long-shift-rate", type=float, default=0.005, help="משמרות של 17-20 שעות")
+    parser.add_argument("--location-updates", type=int, default=2, help="עדכוני היכן אני כעת בכל משמרת")
+    parser.add_argument("--absent", type=int, default=None, help="עובדים ברשימה שלא דיווחו (ברירת מחדל 5%%)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replace", action="store_true", help="מחיקת הנתונים הקיימים לפני המילוי")
+    args = parser.parse_args(argv)
+    if args.absent is None:
+        args.absent = args.employees // 20
+    # מ.א הוא ארבע ספרות
+    if not 0 < args.employees + args.absent <= 10000 - FIRST_PERSONAL_ID:
+        parser.error(f"מספר העובדים (כולל --absent) חייב להיות עד {10000 - FIRST_PERSONAL_ID}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+    con = db.connect(args.db)
+    if con.execute("SELECT COUNT(*) FROM reports").fetchone()[0] and not args.replace:
+        sys.exit(f"{args.db} כבר מכיל דיווחים - יש להוסיף --replace כדי להחליף אותם")
+    with db.transaction(con):
+        db.reset_reports(con)
+        db.reset_green_eyes(con)
+        generate(con, args)
+    # בנייה בטרנזקציה נפרדת: סריקת דיווחים שטרם נשמרו בקובץ איטית פי עשרה
+    with db.transaction(con):
+        shift_hours.rebuild(con)
+        rollups.rebuild(con)
+    con.execute("CHECKPOINT")
+    for table, count in counts(con).items():
+        print(f"{table:<20} {count:>10,}")
+    con.close()
+    print(f"{args.db}: {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
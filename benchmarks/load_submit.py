@@ -0,0 +1,110 @@
+"""בדיקת עומס להגשת טפסים: זמן התגובה של submit עם 100 משתמשים במקביל
+
+משווה בין שמירה ישירה (INSERT וטרנזקציה לכל הגשה על החיבור המשותף, כמו קודם)
+לבין תור ההגשות ב-submissions.py, ומדפיס p50/p99 של זמן ההגשה.
+
+הרצה:
+    python benchmarks/load_submit.py --sessions 100 --submits 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import submissions  # noqa: E402
+
+
+def make_report(session, index):
+    now = datetime.now().astimezone()
+    entry = index % 2 == 0
+    return {
+        "report_type": "entry" if entry else "exit",
+        "personal_id": f"{1000 + session}",
+        "rahal": "ויסאם אסד",
+        "work_location": "משגב" if entry else None,
+        "replacing_who": "לא הועברה חפיפה",
+        "replacement_person": "לא הועברה חפיפה",
+        "reports_count": None if entry else index,
+        "special_notes": None,
+        "timestamp": now,
+        "start_date": now.date() if entry else None,
+        "start_time": now.time().replace(microsecond=0) if entry else None,
+        "end_date": None if entry else now.date(),
+        "end_time": None if entry else now.time().replace(microsecond=0),
+    }
+
+
+def run_sessions(sessions, submits, submit):
+    """הרצת כל המשתמשים יחד; מחזיר את זמני ההגשה במילישניות"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(sessions)
+
+    def session(number):
+        barrier.wait()
+        for index in range(submits):
+            report = make_report(number, index)
+            started = time.perf_counter()
+            submit(report)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def percentile(values, p):
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--submits", type=int, default=5, help="הגשות לכל משתמש")
+    args = parser.parse_args()
+    expected = args.sessions * args.submits
+
+    with tempfile.TemporaryDirectory() as directory:
+        # שמירה ישירה - חיבור אחד משותף לכל המשתמשים
+        con = db.connect(os.path.join(directory, "direct.db"))
+        con_lock = threading.Lock()
+
+        def direct(report):
+            with con_lock, db.transaction(con):
+                db.insert_reports(con, [report])
+
+        direct_latencies = run_sessions(args.sessions, args.submits, direct)
+        assert con.execute("SELECT COUNT(*) FROM reports").fetchone()[0] == expected
+        con.close()
+
+        # תור ההגשות
+        database = db.ConnectionManager(os.path.join(directory, "queued.db"))
+        queue = submissions.SubmissionQueue(database, directory=os.path.join(directory, "queue"))
+        queued_latencies = run_sessions(args.sessions, args.submits, lambda report: queue.submit("reports", report))
+        started = time.perf_counter()
+        queue.close()
+        drain = time.perf_counter() - started
+        assert database.read("SELECT COUNT(*) FROM reports")[0][0] == expected
+        database.close()
+
+    print(f"{args.sessions} משתמשים x {args.submits} הגשות")
+    print(f"{'mode':<8} {'p50 [ms]':>10} {'p99 [ms]':>10} {'max [ms]':>10}")
+    for mode, latencies in (("direct", direct_latencies), ("queued", queued_latencies)):
+        print(f"{mode:<8} {percentile(latencies, 50):>10.2f} {percentile(latencies, 99):>10.2f} {max(latencies):>10.2f}")
+    print(f"ריקון התור לאחר ההגשות: {drain:.3f} שניות")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""בדיקת עומס בתוך התהליך: קוראים וכותבים במקביל דרך db.ConnectionManager
+
+הכותבים שומרים דיווחים, ובכל הגשה עשירית מעדכנים כולם את אותה שורה ב-green_eyes
+כדי לייצר התנגשויות כתיבה; הקוראים מריצים את שאילתות דפי הניהול. הבדיקה נכשלת
+(קוד יציאה 1) אם הייתה שגיאה כלשהי או אם מספר השורות אינו תואם.
+
+הרצה:
+    python benchmarks/stress_connections.py --writers 20 --readers 10 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+from baseline_queries import TRACKING_QUERY  # noqa: E402
+from queries import WEEKLY_HOURS_QUERY, all_reports_page_query  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = db.ConnectionManager(os.path.join(directory, "stress.db"))
+        week_start = date.today() - timedelta(days=(date.today().weekday() + 1) % 7)
+        deadline = time.monotonic() + args.seconds
+        counts = {"writes": 0, "reads": 0}
+        errors = []
+        lock = threading.Lock()
+
+        def write(con, number, sequence):
+            now = datetime.now().astimezone()
+            entry = sequence % 2 == 0
+            db.insert_reports(con, [{
+                "report_type": "entry" if entry else "exit",
+                "personal_id": f"{1000 + number}",
+                "rahal": "ויסאם אסד",
+                "work_location": "משגב" if entry else None,
+                "replacing_who": None,
+                "replacement_person": None,
+                "reports_count": None if entry else sequence,
+                "special_notes": None,
+                "timestamp": now,
+                "start_date": now.date() if entry else None,
+                "start_time": now.time() if entry else None,
+                "end_date": None if entry else now.date(),
+                "end_time": None if entry else now.time(),
+            }])
+            if sequence % 10:
+                return
+            db.upsert_locations(con, [{
+                "personal_id": "0000",
+                "current_location": f"writer {number}",
+                "on_shift": "כן",
+                "timestamp": now,
+            }])
+
+        def writer(number):
+            sequence = 0
+            while time.monotonic() < deadline:
+                try:
+                    database.write(write, number, sequence)
+                    sequence += 1
+                except Exception as e:
+                    errors.append(f"writer {number}: {e}")
+            with lock:
+                counts["writes"] += sequence
+
+        def reader(number):
+            done = 0
+            queries = [(WEEKLY_HOURS_QUERY, [week_start]), (TRACKING_QUERY, None), all_reports_page_query({})]
+            while time.monotonic() < deadline:
+                query, params = queries[done % len(queries)]
+                try:
+                    database.read(query, params)
+                    done += 1
+                except Exception as e:
+                    errors.append(f"reader {number}: {e}")
+            with lock:
+                counts["reads"] += done
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+        threads += [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stored = database.read("SELECT COUNT(*) FROM reports")[0][0]
+        database.close()
+
+    print(f"writes: {counts['writes']} ({counts['writes'] / args.seconds:.0f}/s), "
+          f"reads: {counts['reads']} ({counts['reads'] / args.seconds:.0f}/s), "
+          f"retried conflicts: {database.conflicts}, errors: {len(errors)}")
+    for error in errors[:10]:
+        print("  ", error)
+    if errors or stored != counts["writes"]:
+        print(f"FAILED: {stored} rows stored, {counts['writes']} writes reported")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
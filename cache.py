@@ -0,0 +1,79 @@
+"""מטמון לתוצאות שאילתות הקריאה של דפי הניהול
+
+כל תוצאה נשמרת לפי השאילתה והפרמטרים שלה, יחד עם גרסאות הטבלאות שהיא נשענת
+עליהן. כל כתיבה לטבלה (שמירת הגשות מהתור, איפוס נתונים) מעלה את הגרסה שלה,
+וכך תוצאה מוגשת מהמטמון עד שהטבלה שלה באמת משתנה.
+"""
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 256
+
+# טבלאות שנכתבות יחד עם טבלה אחרת (מחושבות ממנה או מתעדות אותה)
+DERIVED_TABLES = {
+    "reports": ("shift_hours", "weekly_hours", "report_archive", "location_hourly", "rahal_weekly"),
+    "green_eyes": ("green_eyes_history",),
+}
+
+
+class QueryCache:
+    """מטמון משותף לכל הסשנים בתהליך; בטוח לשימוש מכמה תהליכונים במקביל"""
+
+    def __init__(self, database, max_entries=MAX_ENTRIES):
+        # database הוא db.ConnectionManager
+        self._database = database
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._versions = {}
+        # עולה ב-clear, כך שגם קריאה שהתחילה לפניו לא תישמר
+        self._generation = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, query, params=None, tables=(), label="query"):
+        """כמו database.read, עם שמירת התוצאה עד לשינוי באחת מהטבלאות tables
+
+        רק החטאה מריצה את השאילתה ולכן רק היא נרשמת בזמני השאילתות תחת label.
+        """
+        key = (query, tuple(params or ()))
+        with self._lock:
+            # הגרסאות נלקחות לפני הקריאה - כתיבה שתסתיים במהלכה תפסול את התוצאה
+            versions = (self._generation,) + tuple(self._versions.get(table, 0) for table in tables)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        rows = self._database.read(query, params, label)
+        with self._lock:
+            self._entries[key] = (versions, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return rows
+
+    def invalidate(self, *tables):
+        """סימון הטבלאות (והטבלאות המחושבות מהן) כמשתנות; לקרוא אחרי שהכתיבה נשמרה"""
+        with self._lock:
+            for table in tables:
+                for changed in (table,) + DERIVED_TABLES.get(table, ()):
+                    self._versions[changed] = self._versions.get(changed, 0) + 1
+
+    def clear(self):
+        """פסילת כל התוצאות - כשכל הנתונים מתחלפים יחד (עותק קריאה חדש, ראו replica.py)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
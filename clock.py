@@ -0,0 +1,37 @@
+"""שעון האפליקציה
+
+כל אירוע (דיווח משמרת, עדכון היכן אני כעת) מקבל זמן אחד עם אזור זמן, ושדות
+התאריך והשעה של הדיווח נגזרים ממנו לפי שעון ישראל - כך שהשוואה ומיון של
+אירועים הם תמיד השוואה בין ערכי TIMESTAMPTZ.
+"""
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+TIMEZONE = "Asia/Jerusalem"
+ISRAEL = ZoneInfo(TIMEZONE)
+
+
+def now():
+    """הזמן הנוכחי בשעון ישראל"""
+    return datetime.now(ISRAEL)
+
+
+def today():
+    """התאריך הנוכחי בישראל (ולא לפי אזור הזמן של השרת)"""
+    return now().date()
+
+
+def start_of_day(day):
+    """תחילת היום בשעון ישראל, לסינון לפי טווחי תאריכים"""
+    return datetime.combine(day, time.min, ISRAEL)
+
+
+def report_times(report_type, timestamp):
+    """שדות התאריך והשעה של דיווח, נגזרים מזמן הדיווח"""
+    if timestamp.tzinfo is None:
+        raise ValueError("זמן הדיווח חייב לכלול אזור זמן")
+    local = timestamp.astimezone(ISRAEL)
+    day, clock_time = local.date(), local.time().replace(microsecond=0)
+    if report_type == "entry":
+        return {"start_date": day, "start_time": clock_time, "end_date": None, "end_time": None}
+    return {"start_date": None, "start_time": None, "end_date": day, "end_time": clock_time}
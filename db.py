@@ -0,0 +1,558 @@
+"""חיבור למסד הנתונים וניהול גרסאות הסכמה"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import duckdb
+
+import clock
+import metrics
+import rollups
+import shift_hours
+
+DB_PATH = "reports.db"
+TIMEZONE = clock.TIMEZONE
+
+
+def connect(path=DB_PATH, read_only=False):
+    """פתיחת מסד הנתונים והרצת כל המיגרציות שטרם הורצו
+
+    read_only - לעותק לקריאה בלבד (replica.py), שכבר נוצר בסכמה העדכנית; ללא מיגרציות.
+    """
+    con = duckdb.connect(path, read_only=read_only)
+    # כל עמודות TIMESTAMPTZ מוצגות ומפורשות לפי שעון ישראל - גם בסמנים שנפתחים מהחיבור
+    con.execute(f"SET GLOBAL TimeZone = '{TIMEZONE}'")
+    if not read_only:
+        migrate(con)
+    return con
+
+
+class ConnectionManager:
+    """מופע אחד של מסד הנתונים לכל התהליך, עם סמן (cursor) נפרד לכל תהליכון
+
+    חיבור DuckDB אחד אינו בטוח לשימוש מכמה תהליכונים במקביל, ולכן כל תהליכון
+    (סשן של Streamlit, תהליכון הכתיבה של התור) מקבל סמנים משלו מאותו מופע.
+    """
+
+    def __init__(self, path=DB_PATH, retries=10, backoff=0.01, max_backoff=0.5, read_only=False,
+                 shared_metrics=None):
+        self.path = path
+        self._con = connect(path, read_only)
+        self._local = threading.local()
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._conflicts_lock = threading.Lock()
+        self.conflicts = 0
+        # זמני כל השאילתות והכתיבות דרך המופע, לפי תווית; עותק לקריאה (replica.py)
+        # רושם את זמניו יחד עם המסד הראשי
+        self.metrics = shared_metrics or metrics.Metrics()
+
+    def cursor(self):
+        """סמן הכתיבה של התהליכון הנוכחי"""
+        if getattr(self._local, "writer", None) is None:
+            self._local.writer = self._con.cursor()
+        return self._local.writer
+
+    def read(self, query, params=None, label="query"):
+        """הרצת שאילתת קריאה בטרנזקציה לקריאה בלבד, על סמן נפרד מסמן הכתיבה
+
+        label היא התווית שתחתיה נרשם זמן השאילתה (ראו metrics).
+        """
+        if getattr(self._local, "reader", None) is None:
+            self._local.reader = self._con.cursor()
+        reader = self._local.reader
+        reader.execute("BEGIN TRANSACTION READ ONLY")
+        started = time.perf_counter()
+        rows = error = None
+        try:
+            rows = reader.execute(query, params).fetchall()
+            return rows
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.metrics.record(
+                "query", label, time.perf_counter() - started,
+                rows=None if rows is None else len(rows), error=error, query=query, params=params,
+            )
+            reader.execute("ROLLBACK")
+
+    def write(self, operation, *args, label=None, rows=None):
+        """הרצת operation(cursor, *args) בטרנזקציה, עם ניסיון חוזר בהתנגשות כתיבה
+
+        הזמן נרשם תחת label (ברירת המחדל - שם הפונקציה), כולל הניסיונות החוזרים;
+        rows הוא מספר השורות שנכתבות, אם ידוע מראש.
+        """
+        cursor = self.cursor()
+        started = time.perf_counter()
+        error = None
+        try:
+            return self._write(cursor, operation, args)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.metrics.record(
+                "query", label or operation.__name__, time.perf_counter() - started, rows=rows, error=error,
+            )
+
+    def _write(self, cursor, operation, args):
+        for attempt in range(self._retries + 1):
+            try:
+                with transaction(cursor):
+                    return operation(cursor, *args)
+            # עדכון מקביל של אותו מפתח ראשי מתגלה כ-ConstraintException ולא כהתנגשות טרנזקציה
+            except (duckdb.TransactionException, duckdb.ConstraintException):
+                if attempt == self._retries:
+                    raise
+                with self._conflicts_lock:
+                    self.conflicts += 1
+                # המתנה מעריכית עם רעש אקראי, כדי שהכותבים המתנגשים לא ינסו שוב יחד
+                delay = min(self._backoff * 2 ** attempt, self._max_backoff)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def close(self):
+        self._con.close()
+
+
+REPORT_COLUMNS = (
+    "report_type", "personal_id", "rahal",
+    "work_location", "replacing_who", "replacement_person",
+    "reports_count", "special_notes", "timestamp",
+    "start_date", "start_time", "end_date", "end_time",
+)
+
+
+LOCATION_COLUMNS = ("personal_id", "current_location", "on_shift", "timestamp")
+
+
+@contextmanager
+def transaction(con):
+    """טרנזקציה שמתבטלת במלואה אם נזרקה חריגה"""
+    con.begin()
+    try:
+        yield con
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+
+
+def insert_reports(con, reports):
+    """שמירת דיווחי משמרת לפי הסדר ועדכון טבלאות השעות (יש לקרוא בתוך טרנזקציה)
+
+    שדות התאריך והשעה נגזרים תמיד מ-timestamp (ראו clock.report_times).
+    """
+    weeks = set()
+    rollup_days, rollup_weeks = set(), set()
+    for report in reports:
+        if report["timestamp"] is not None:
+            report = {**report, **clock.report_times(report["report_type"], report["timestamp"])}
+        con.execute(f"""
+            INSERT INTO reports ({", ".join(REPORT_COLUMNS)})
+            VALUES ({", ".join("?" for _ in REPORT_COLUMNS)})
+        """, [report[column] for column in REPORT_COLUMNS])
+        weeks |= shift_hours.on_report(con, report)
+        days, rahal_weeks = rollups.affected(report)
+        rollup_days |= days
+        rollup_weeks |= rahal_weeks
+    # כל שבוע (ויום בטבלאות הסיכום) שהושפע מחושב פעם אחת למנה כולה
+    shift_hours.refresh_weeks(con, weeks)
+    rollups.refresh(con, rollup_days, rollup_weeks)
+
+
+def upsert_locations(con, locations):
+    """רישום עדכוני היכן אני כעת בהיסטוריה ועדכון המיקום האחרון של כל עובד"""
+    for location in locations:
+        con.execute(f"""
+            INSERT INTO green_eyes_history ({", ".join(LOCATION_COLUMNS)})
+            VALUES ({", ".join("?" for _ in LOCATION_COLUMNS)})
+        """, [location[column] for column in LOCATION_COLUMNS])
+        con.execute(f"""
+            INSERT OR REPLACE INTO green_eyes ({", ".join(LOCATION_COLUMNS)})
+            VALUES ({", ".join("?" for _ in LOCATION_COLUMNS)})
+        """, [location[column] for column in LOCATION_COLUMNS])
+
+
+def import_roster(con, path):
+    """החלפת רשימת העובדים בתוכן קובץ CSV (יש לקרוא בתוך טרנזקציה)
+
+    עמודות הקובץ: personal_id, name, rahal, locations - כמה מיקומים מופרדים ב-";".
+    מחזיר את מספר העובדים שנטענו.
+    """
+    con.execute("DELETE FROM roster")
+    con.execute("""
+        INSERT INTO roster
+        SELECT
+            trim(personal_id),
+            nullif(trim(name), ''),
+            nullif(trim(rahal), ''),
+            list_filter(list_transform(string_split(coalesce(locations, ''), ';'), x -> trim(x)), x -> x <> '')
+        FROM read_csv(?, header = true, all_varchar = true)
+    """, [path])
+    return con.execute("SELECT COUNT(*) FROM roster").fetchone()[0]
+
+
+def reset_reports(con):
+    """מחיקת כל דיווחי המשמרות והטבלאות הנגזרות מהם (יש לקרוא בתוך טרנזקציה)
+
+    גם הארכיון מתרוקן; את קבצי ה-Parquet שלו מוחק archive.remove_orphans.
+    """
+    for table in rollups.TABLES:
+        con.execute(f"DELETE FROM {table}")
+    con.execute("DELETE FROM weekly_hours")
+    con.execute("DELETE FROM shift_hours")
+    con.execute("DELETE FROM reports")
+    con.execute("DELETE FROM report_archive")
+    refresh_reports_view(con)
+
+
+def refresh_reports_view(con):
+    """יצירה מחדש של התצוגה reports_all מ-reports ומקבצי הארכיון שב-report_archive
+
+    month נגזר בטבלה מהזמן ובארכיון מנתיב הקובץ (month=YYYY-MM), כך שסינון לפיו
+    מדלג על קבצים שלמים. יש לקרוא בכל שינוי של report_archive, באותה טרנזקציה.
+    """
+    paths = [path for (path,) in con.execute("SELECT path FROM report_archive ORDER BY month, path").fetchall()]
+    query = f"SELECT *, strftime(timezone('{TIMEZONE}', timestamp), '%Y-%m') AS month FROM reports"
+    if paths:
+        files = ", ".join("'" + path.replace("'", "''") + "'" for path in paths)
+        query += f"""
+        UNION ALL BY NAME
+        SELECT * FROM read_parquet([{files}], hive_partitioning = true, hive_types = {{'month': VARCHAR}})
+        """
+    con.execute(f"CREATE OR REPLACE VIEW reports_all AS {query}")
+
+
+def reset_green_eyes(con):
+    """מחיקת כל נתוני היכן אני כעת, כולל ההיסטוריה (יש לקרוא בתוך טרנזקציה)"""
+    con.execute("DELETE FROM green_eyes_history")
+    con.execute("DELETE FROM green_eyes")
+
+
+def _create_tables(con):
+    """גרסה 1 - הסכמה המקורית, כל העמודות כטקסט"""
+    # יצירת טבלת דיווחים
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS reports (
+        report_type TEXT,
+        personal_id TEXT,
+        rahal TEXT,
+        work_location TEXT,
+        replacing_who TEXT,
+        replacement_person TEXT,
+        reports_count INTEGER,
+        special_notes TEXT,
+        timestamp TEXT,
+        start_date TEXT,
+        start_time TEXT,
+        end_date TEXT,
+        end_time TEXT
+    )
+    """)
+    # יצירת טבלת היכן אני כעת
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS green_eyes (
+        personal_id TEXT,
+        current_location TEXT,
+        timestamp TEXT,
+        on_shift TEXT,
+        PRIMARY KEY (personal_id)
+    )
+    """)
+
+
+def _typed_columns(con):
+    """גרסה 2 - עמודות תאריך ושעה בטיפוסים טבעיים במקום טקסט
+
+    הטבלאות נבנות מחדש וממוינות לפי timestamp, כך שמפות ה-min/max של DuckDB
+    מאפשרות לדלג על קבוצות שורות בסינון לפי זמן. ערכים שאינם ניתנים להמרה נשמרים כ-NULL.
+    timestamp ישן ללא אזור זמן מפורש לפי שעון ישראל.
+    """
+    con.execute("CREATE TYPE report_type_enum AS ENUM ('entry', 'exit')")
+    con.execute("""
+    CREATE TABLE reports_typed (
+        report_type report_type_enum,
+        personal_id VARCHAR,
+        rahal VARCHAR,
+        work_location VARCHAR,
+        replacing_who VARCHAR,
+        replacement_person VARCHAR,
+        reports_count INTEGER,
+        special_notes VARCHAR,
+        timestamp TIMESTAMPTZ,
+        start_date DATE,
+        start_time TIME,
+        end_date DATE,
+        end_time TIME
+    )
+    """)
+    con.execute("""
+    INSERT INTO reports_typed
+    SELECT
+        TRY_CAST(report_type AS report_type_enum),
+        personal_id,
+        rahal,
+        work_location,
+        replacing_who,
+        replacement_person,
+        reports_count,
+        special_notes,
+        TRY_CAST(timestamp AS TIMESTAMPTZ),
+        TRY_CAST(start_date AS DATE),
+        TRY_CAST(start_time AS TIME),
+        TRY_CAST(end_date AS DATE),
+        TRY_CAST(end_time AS TIME)
+    FROM reports
+    ORDER BY TRY_CAST(timestamp AS TIMESTAMPTZ)
+    """)
+    con.execute("DROP TABLE reports")
+    con.execute("ALTER TABLE reports_typed RENAME TO reports")
+    con.execute("CREATE INDEX reports_personal_id_idx ON reports (personal_id)")
+
+    con.execute("""
+    CREATE TABLE green_eyes_typed (
+        personal_id VARCHAR,
+        current_location VARCHAR,
+        timestamp TIMESTAMPTZ,
+        on_shift VARCHAR,
+        PRIMARY KEY (personal_id)
+    )
+    """)
+    con.execute("""
+    INSERT INTO green_eyes_typed
+    SELECT personal_id, current_location, TRY_CAST(timestamp AS TIMESTAMPTZ), on_shift
+    FROM green_eyes
+    ORDER BY TRY_CAST(timestamp AS TIMESTAMPTZ)
+    """)
+    con.execute("DROP TABLE green_eyes")
+    con.execute("ALTER TABLE green_eyes_typed RENAME TO green_eyes")
+
+
+def _shift_hours_tables(con):
+    """גרסה 3 - טבלאות שעות מחושבות מראש, מאוכלסות מהדיווחים הקיימים"""
+    con.execute("""
+    CREATE TABLE shift_hours (
+        personal_id VARCHAR,
+        work_location VARCHAR,
+        entry_timestamp TIMESTAMPTZ,
+        start_date DATE,
+        start_time TIME,
+        exit_timestamp TIMESTAMPTZ,
+        end_date DATE,
+        end_time TIME,
+        hours_worked DOUBLE,
+        week_start DATE
+    )
+    """)
+    con.execute("""
+    CREATE TABLE weekly_hours (
+        personal_id VARCHAR,
+        week_start DATE,
+        work_locations VARCHAR,
+        total_shifts INTEGER,
+        completed_shifts INTEGER,
+        total_hours DOUBLE,
+        first_shift_date DATE,
+        last_shift_date DATE,
+        PRIMARY KEY (personal_id, week_start)
+    )
+    """)
+    con.execute("CREATE INDEX shift_hours_personal_id_idx ON shift_hours (personal_id)")
+    shift_hours.rebuild(con, source="reports")
+
+
+def _submission_queue_state(con):
+    """גרסה 4 - המקטע והמיקום בתור ההגשות שעד אליהם הכול כבר נשמר (ראו submissions.py)"""
+    con.execute("""
+    CREATE TABLE submission_queue_state (
+        segment BIGINT,
+        position BIGINT
+    )
+    """)
+    con.execute("INSERT INTO submission_queue_state VALUES (0, 0)")
+
+
+def _report_ids(con):
+    """גרסה 5 - מזהה רץ לכל דיווח, למיון יציב ולעימוד לפי מפתח
+
+    הטבלה נבנית מחדש במקום ALTER TABLE ... DEFAULT nextval, שאותו DuckDB
+    אינו מצליח לשחזר מקובץ ה-WAL.
+    """
+    count = con.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    con.execute(f"CREATE SEQUENCE reports_id_seq START {count + 1}")
+    con.execute("""
+    CREATE TABLE reports_with_ids (
+        report_id BIGINT DEFAULT nextval('reports_id_seq'),
+        report_type report_type_enum,
+        personal_id VARCHAR,
+        rahal VARCHAR,
+        work_location VARCHAR,
+        replacing_who VARCHAR,
+        replacement_person VARCHAR,
+        reports_count INTEGER,
+        special_notes VARCHAR,
+        timestamp TIMESTAMPTZ,
+        start_date DATE,
+        start_time TIME,
+        end_date DATE,
+        end_time TIME
+    )
+    """)
+    con.execute("""
+    INSERT INTO reports_with_ids
+    SELECT row_number() OVER (ORDER BY timestamp NULLS FIRST, rowid), *
+    FROM reports
+    ORDER BY timestamp
+    """)
+    con.execute("DROP TABLE reports")
+    con.execute("ALTER TABLE reports_with_ids RENAME TO reports")
+    con.execute("CREATE INDEX reports_personal_id_idx ON reports (personal_id)")
+
+
+def _green_eyes_history(con):
+    """גרסה 6 - כל עדכוני היכן אני כעת, בנוסף למצב האחרון ב-green_eyes
+
+    העדכונים הקיימים (רק האחרון של כל עובד) נכנסים להיסטוריה כנקודת ההתחלה.
+    """
+    count = con.execute("SELECT COUNT(*) FROM green_eyes").fetchone()[0]
+    con.execute(f"CREATE SEQUENCE green_eyes_event_seq START {count + 1}")
+    con.execute("""
+    CREATE TABLE green_eyes_history (
+        event_id BIGINT DEFAULT nextval('green_eyes_event_seq'),
+        personal_id VARCHAR,
+        current_location VARCHAR,
+        on_shift VARCHAR,
+        timestamp TIMESTAMPTZ
+    )
+    """)
+    con.execute("""
+    INSERT INTO green_eyes_history
+    SELECT row_number() OVER (ORDER BY timestamp NULLS FIRST, personal_id),
+           personal_id, current_location, on_shift, timestamp
+    FROM green_eyes
+    ORDER BY timestamp NULLS FIRST, personal_id
+    """)
+
+
+def _roster(con):
+    """גרסה 7 - רשימת העובדים: רח"ל ומיקומי העבודה של כל עובד"""
+    con.execute("""
+    CREATE TABLE roster (
+        personal_id VARCHAR PRIMARY KEY,
+        name VARCHAR,
+        rahal VARCHAR,
+        locations VARCHAR[]
+    )
+    """)
+
+
+def _timestamp_durations(con):
+    """גרסה 8 - חישוב מחדש של שעות המשמרות מזמני הכניסה והיציאה עצמם"""
+    shift_hours.rebuild(con, source="reports")
+
+
+def _normalize_timestamps(con):
+    """גרסה 9 - זמן אחד לכל דיווח, ושדות התאריך והשעה נגזרים ממנו
+
+    בדיווחים ישנים timestamp נשמר בשעון השרת, ושדות התאריך והשעה תמיד בשעון ישראל.
+    כשהם חסרים זה לזה או רחוקים ביותר מדקה, שדות התאריך והשעה קובעים את הזמן.
+    """
+    fields = """
+        CASE report_type
+            WHEN 'entry' THEN start_date + start_time
+            WHEN 'exit' THEN end_date + end_time
+        END
+    """
+    con.execute(f"""
+    UPDATE reports
+    SET timestamp = timezone('{TIMEZONE}', {fields})
+    WHERE {fields} IS NOT NULL
+    AND (timestamp IS NULL OR abs(epoch(timestamp - timezone('{TIMEZONE}', {fields}))) > 60)
+    """)
+    local = f"timezone('{TIMEZONE}', timestamp)"
+    con.execute(f"""
+    UPDATE reports
+    SET start_date = CASE WHEN report_type = 'entry' THEN CAST({local} AS DATE) END,
+        start_time = CASE WHEN report_type = 'entry' THEN CAST(date_trunc('second', {local}) AS TIME) END,
+        end_date = CASE WHEN report_type = 'exit' THEN CAST({local} AS DATE) END,
+        end_time = CASE WHEN report_type = 'exit' THEN CAST(date_trunc('second', {local}) AS TIME) END
+    WHERE timestamp IS NOT NULL AND report_type IS NOT NULL
+    """)
+    shift_hours.rebuild(con, source="reports")
+
+
+def _report_archive(con):
+    """גרסה 10 - ארכיון חודשי של דיווחים בקבצי Parquet, ו-reports_all שמאחדת אותו עם reports"""
+    con.execute("""
+    CREATE TABLE report_archive (
+        month VARCHAR,
+        path VARCHAR PRIMARY KEY,
+        rows BIGINT,
+        bytes BIGINT,
+        first_report_id BIGINT,
+        last_report_id BIGINT,
+        archived_at TIMESTAMPTZ
+    )
+    """)
+    refresh_reports_view(con)
+
+
+def _operational_rollups(con):
+    """גרסה 11 - טבלאות הסיכום של לשונית הניתוח (ראו rollups.py), מאוכלסות מהקיים"""
+    con.execute("""
+    CREATE TABLE location_hourly (
+        day DATE,
+        hour INTEGER,
+        work_location VARCHAR,
+        shifts INTEGER,
+        staffed_hours DOUBLE
+    )
+    """)
+    con.execute("""
+    CREATE TABLE rahal_weekly (
+        rahal VARCHAR,
+        week_start DATE,
+        shifts INTEGER,
+        employees INTEGER,
+        reports_total BIGINT,
+        PRIMARY KEY (rahal, week_start)
+    )
+    """)
+    rollups.rebuild(con)
+
+
+# רשימת המיגרציות לפי הסדר - מספר הגרסה הוא המיקום ברשימה ועוד 1
+MIGRATIONS = [
+    _create_tables,
+    _typed_columns,
+    _shift_hours_tables,
+    _submission_queue_state,
+    _report_ids,
+    _green_eyes_history,
+    _roster,
+    _timestamp_durations,
+    _normalize_timestamps,
+    _report_archive,
+    _operational_rollups,
+]
+
+
+def schema_version(con):
+    """גרסת הסכמה הנוכחית של מסד הנתונים (0 למסד חדש)"""
+    con.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER)")
+    return con.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(con):
+    """הרצת המיגרציות החסרות, כל אחת בטרנזקציה נפרדת"""
+    current = schema_version(con)
+    for version, step in enumerate(MIGRATIONS[current:], start=current + 1):
+        with transaction(con):
+            step(con)
+            con.execute("INSERT INTO schema_version VALUES (?)", [version])
+    if current < len(MIGRATIONS):
+        # שינויי הסכמה נכתבים לקובץ עצמו ולא נשארים ב-WAL
+        con.execute("CHECKPOINT")
@@ -0,0 +1,52 @@
+"""ייצוא דיווחי המשמרות לקובץ CSV או Parquet
+
+DuckDB כותב את הקובץ בעצמו (COPY) תוך כדי סריקת הטבלה, כך שהדיווחים אינם
+עוברים דרך pandas. הייצוא מתבצע רק כשמבקשים להוריד את הקובץ.
+
+הזיכרון אינו חסום: st.download_button מגיש רק תוכן שבזיכרון, ולכן הקובץ המוכן
+כולו נקרא לזיכרון השרת ונשמר שם כל עוד ההורדה זמינה - בערך 140 בתים לדיווח
+ב-CSV ו-15 ב-Parquet. לייצוא גדול כדאי לצמצם את טווח התאריכים או לבחור Parquet.
+ה-BOM נוסף בהעתקה בין קבצים, כדי שהקובץ לא יוחזק בזיכרון פעמיים.
+"""
+import os
+import shutil
+
+from queries import export_reports_query
+
+# סוג MIME וסיומת לכל פורמט ייצוא
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Excel מזהה קובץ CSV כ-UTF-8 (ומציג עברית כראוי) רק כשהוא מתחיל ב-BOM
+UTF8_BOM = b"\xef\xbb\xbf"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def export_reports(database, filters, export_format, path):
+    """כתיבת הדיווחים העונים למסננים לקובץ path; מחזיר את מספר השורות שנכתבו"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"פורמט ייצוא לא מוכר: {export_format}")
+    query, params = export_reports_query(filters)
+
+    if export_format == "parquet":
+        return _copy(database, query, params, path, "FORMAT parquet")
+
+    # ל-COPY אין אפשרות לכתוב BOM, ולכן הוא נוסף בהעתקת הקובץ במקטעים ולא בזיכרון
+    partial = path + ".part"
+    try:
+        count = _copy(database, query, params, partial, "FORMAT csv, HEADER")
+        with open(partial, "rb") as source, open(path, "wb") as target:
+            target.write(UTF8_BOM)
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return count
+
+
+def _copy(database, query, params, path, options):
+    target = path.replace("'", "''")
+    return database.read(f"COPY ({query}) TO '{target}' ({options})", params, label="export")[0][0]
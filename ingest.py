@@ -0,0 +1,260 @@
+"""טעינה מרוכזת של דיווחי משמרות ועדכוני היכן אני כעת מקבצים
+
+קובץ CSV, Parquet או JSONL (או תבנית glob של כמה קבצים) נקרא כולו ע"י DuckDB,
+ובשאילתה אחת כל שורה נבדקת לפי הכללים של הטפסים, שורות כפולות (בקובץ עצמו או
+מול מה שכבר שמור) נדחות, והשורות התקינות נוספות יחד. השורות שנדחו נכתבות
+לקובץ CSV עם מספר השורה וסיבת הדחייה.
+
+זמן הדיווח נלקח מעמודת timestamp; זמן ללא אזור זמן מתפרש בשעון ישראל. בקבצים
+ללא timestamp הזמן נבנה משדות התאריך והשעה של הדיווח (YYYY-MM-DD או DD/MM/YYYY).
+
+DuckDB מאפשר תהליך כותב אחד לקובץ, ולכן מ-manage.py יש לטעון כשהאפליקציה אינה רצה:
+    python manage.py ingest reports old_site.csv [--rejects rejected.csv]
+    python manage.py ingest locations backup/*.parquet
+"""
+import os
+
+import db
+import rollups
+import shift_hours
+
+# קורא DuckDB לכל סיומת - CSV נקרא כטקסט כדי שהבדיקות יראו את הערכים כפי שנכתבו
+READERS = {
+    ".csv": "read_csv(?, header = true, all_varchar = true)",
+    ".parquet": "read_parquet(?)",
+    ".jsonl": "read_json(?, format = 'newline_delimited')",
+    ".ndjson": "read_json(?, format = 'newline_delimited')",
+    ".json": "read_json(?)",
+}
+
+PERSONAL_ID_PATTERN = "[0-9]{4}"
+ON_SHIFT_VALUES = ("כן", "לא")
+
+
+def _reader(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"סוג קובץ לא נתמך: {extension or path} (אפשר: {', '.join(READERS)})")
+    return READERS[extension]
+
+
+def _text(columns, name):
+    """העמודה כטקסט ללא רווחים מסביב, או NULL אם היא חסרה בקובץ או ריקה"""
+    if name not in columns:
+        return "NULL::VARCHAR"
+    return f"nullif(trim(CAST(\"{name}\" AS VARCHAR)), '')"
+
+
+def _local_date(value):
+    return f"COALESCE(TRY_CAST({value} AS DATE), CAST(try_strptime({value}, '%d/%m/%Y') AS DATE))"
+
+
+def _parse_timestamp(value):
+    """זמן עם אזור זמן מטקסט; זמן ללא אזור זמן מתפרש בשעון ישראל"""
+    return f"""COALESCE(
+        TRY_CAST({value} AS TIMESTAMPTZ),
+        timezone('{db.TIMEZONE}', try_strptime({value}, ['%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S']))
+    )"""
+
+
+def _timestamp(columns, name):
+    """עמודת הזמן כ-TIMESTAMPTZ; עמודה שכבר מוקלדת (למשל ב-Parquet) אינה עוברת דרך טקסט"""
+    column_type = columns.get(name)
+    if column_type == "TIMESTAMP WITH TIME ZONE":
+        return f'"{name}"'
+    if column_type is not None and column_type.startswith("TIMESTAMP"):
+        return f"timezone('{db.TIMEZONE}', \"{name}\")"
+    return _parse_timestamp(_text(columns, name))
+
+
+def _stage(con, path):
+    """קריאת הקובץ לטבלה זמנית ingest_raw עם מספר שורה; מחזיר את סוג כל עמודה לפי שמה"""
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE ingest_raw AS
+        SELECT row_number() OVER () AS line, * FROM {_reader(path)}
+    """, [path])
+    return dict(con.execute("SELECT column_name, column_type FROM (DESCRIBE ingest_raw)").fetchall())
+
+
+def _validate(con, select, rules, key, existing):
+    """בניית ingest_rows: השורות מ-select ועמודת error - הכלל הראשון שנכשל, כפילות בקובץ או שורה קיימת
+
+    rules היא רשימת (תנאי לשורה תקינה, סיבת דחייה); key הן העמודות שמזהות שורה
+    כפולה, ו-existing הטבלה שבה נבדק אם השורה כבר שמורה.
+    """
+    checks = " ".join(f"WHEN NOT COALESCE({condition}, false) THEN '{reason}'" for condition, reason in rules)
+    key_columns = ", ".join(key)
+    join = " AND ".join(f"e.{column} = c.{column}" for column in key)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE ingest_rows AS
+        WITH parsed AS ({select}),
+        checked AS (
+            SELECT *, CASE {checks} END AS error FROM parsed
+        )
+        SELECT * EXCLUDE (error),
+            CASE
+                WHEN error IS NOT NULL THEN error
+                WHEN line NOT IN (
+                    SELECT min(line) FROM checked WHERE error IS NULL GROUP BY {key_columns}
+                ) THEN 'שורה כפולה בקובץ'
+                WHEN EXISTS (SELECT 1 FROM {existing} e WHERE {join}) THEN 'כבר קיים במערכת'
+            END AS error
+        FROM checked c
+    """)
+
+
+def _write_rejects(con, rejects_path):
+    """כתיבת השורות שנדחו, כפי שהופיעו בקובץ, עם מספר השורה וסיבת הדחייה"""
+    rejected = con.execute("SELECT COUNT(*) FROM ingest_rows WHERE error IS NOT NULL").fetchone()[0]
+    if rejected:
+        target = rejects_path.replace("'", "''")
+        con.execute(f"""
+            COPY (
+                SELECT r.line, i.error, r.* EXCLUDE (line)
+                FROM ingest_rows i JOIN ingest_raw r USING (line)
+                WHERE i.error IS NOT NULL
+                ORDER BY r.line
+            ) TO '{target}' (FORMAT csv, HEADER)
+        """)
+    return rejected
+
+
+def _finish(con, rejects_path):
+    rejected = _write_rejects(con, rejects_path)
+    loaded = con.execute("SELECT COUNT(*) FROM ingest_rows WHERE error IS NULL").fetchone()[0]
+    con.execute("DROP TABLE ingest_rows")
+    con.execute("DROP TABLE ingest_raw")
+    return {"loaded": loaded, "rejected": rejected, "rejects_path": rejects_path if rejected else None}
+
+
+def load_reports(con, path, rejects_path):
+    """טעינת דיווחי משמרות ל-reports (יש לקרוא בתוך טרנזקציה, ואחריה shift_hours.rebuild ו-rollups.rebuild)
+
+    אותם כללים כמו בטופס הדיווח: מ.א בן 4 ספרות, סוג דיווח entry או exit, רח"ל,
+    מיקום עבודה בכניסה ומספר דיווחים (שלם, לא שלילי) ביציאה. דיווח שכבר קיים
+    (אותו סוג, מ.א וזמן, גם בארכיון) נדחה, כך שטעינה חוזרת של אותו קובץ אינה מכפילה.
+    מחזיר מילון עם loaded, rejected ו-rejects_path.
+    """
+    columns = _stage(con, path)
+    text = {name: _text(columns, name) for name in db.REPORT_COLUMNS}
+    fields_timestamp = f"""
+        CASE {text["report_type"]}
+            WHEN 'entry' THEN timezone('{db.TIMEZONE}', {_local_date(text["start_date"])} + TRY_CAST({text["start_time"]} AS TIME))
+            WHEN 'exit' THEN timezone('{db.TIMEZONE}', {_local_date(text["end_date"])} + TRY_CAST({text["end_time"]} AS TIME))
+        END
+    """
+    select = f"""
+        SELECT line,
+            {text["report_type"]} AS report_type,
+            {text["personal_id"]} AS personal_id,
+            {text["rahal"]} AS rahal,
+            {text["work_location"]} AS work_location,
+            {text["replacing_who"]} AS replacing_who,
+            {text["replacement_person"]} AS replacement_person,
+            TRY_CAST({text["reports_count"]} AS INTEGER) AS reports_count,
+            {text["reports_count"]} AS reports_count_text,
+            {text["special_notes"]} AS special_notes,
+            COALESCE({_timestamp(columns, "timestamp")}, {fields_timestamp}) AS timestamp
+        FROM ingest_raw
+    """
+    _validate(con, select, [
+        ("personal_id IS NOT NULL", "חסר מספר אישי"),
+        (f"regexp_full_match(personal_id, '{PERSONAL_ID_PATTERN}')", "מספר אישי חייב להיות 4 ספרות"),
+        ("report_type IN ('entry', 'exit')", "סוג דיווח חייב להיות entry או exit"),
+        ("rahal IS NOT NULL", 'חסר רח"ל'),
+        ("timestamp IS NOT NULL", "זמן דיווח חסר או לא תקין"),
+        ("report_type = 'exit' OR work_location IS NOT NULL", "חסר מיקום עבודה"),
+        ("report_type = 'entry' OR reports_count >= 0", "מספר דיווחים חסר או לא תקין"),
+        ("report_type = 'exit' OR reports_count_text IS NULL", "מספר דיווחים שייך רק לדיווח יציאה"),
+    ], key=("report_type", "personal_id", "timestamp"), existing="reports_all")
+
+    # שדות התאריך והשעה נגזרים מהזמן, כמו ב-clock.report_times
+    local = f"timezone('{db.TIMEZONE}', timestamp)"
+    con.execute(f"""
+        INSERT INTO reports ({", ".join(db.REPORT_COLUMNS)})
+        SELECT report_type, personal_id, rahal, work_location, replacing_who, replacement_person,
+            reports_count, special_notes, timestamp,
+            CASE WHEN report_type = 'entry' THEN CAST({local} AS DATE) END,
+            CASE WHEN report_type = 'entry' THEN CAST(date_trunc('second', {local}) AS TIME) END,
+            CASE WHEN report_type = 'exit' THEN CAST({local} AS DATE) END,
+            CASE WHEN report_type = 'exit' THEN CAST(date_trunc('second', {local}) AS TIME) END
+        FROM ingest_rows
+        WHERE error IS NULL
+        ORDER BY timestamp, line
+    """)
+    return _finish(con, rejects_path)
+
+
+def load_locations(con, path, rejects_path):
+    """טעינת עדכוני היכן אני כעת להיסטוריה ול-green_eyes (יש לקרוא בתוך טרנזקציה)
+
+    אותם כללים כמו בטופס: מ.א בן 4 ספרות, מיקום נוכחי, במשמרת כן/לא וזמן.
+    green_eyes מתעדכן רק לעובדים שהעדכון הטעון שלהם חדש מהמיקום השמור.
+    """
+    columns = _stage(con, path)
+    text = {name: _text(columns, name) for name in db.LOCATION_COLUMNS}
+    select = f"""
+        SELECT line,
+            {text["personal_id"]} AS personal_id,
+            {text["current_location"]} AS current_location,
+            {text["on_shift"]} AS on_shift,
+            {_timestamp(columns, "timestamp")} AS timestamp
+        FROM ingest_raw
+    """
+    _validate(con, select, [
+        ("personal_id IS NOT NULL", "חסר מספר אישי"),
+        (f"regexp_full_match(personal_id, '{PERSONAL_ID_PATTERN}')", "מספר אישי חייב להיות 4 ספרות"),
+        ("current_location IS NOT NULL", "חסר מיקום נוכחי"),
+        (f"on_shift IN {ON_SHIFT_VALUES}", "במשמרת חייב להיות כן או לא"),
+        ("timestamp IS NOT NULL", "זמן עדכון חסר או לא תקין"),
+    ], key=("personal_id", "timestamp"), existing="green_eyes_history")
+
+    con.execute(f"""
+        INSERT INTO green_eyes_history ({", ".join(db.LOCATION_COLUMNS)})
+        SELECT {", ".join(db.LOCATION_COLUMNS)}
+        FROM ingest_rows
+        WHERE error IS NULL
+        ORDER BY timestamp, line
+    """)
+    con.execute("""
+        INSERT OR REPLACE INTO green_eyes (personal_id, current_location, on_shift, timestamp)
+        SELECT latest.*
+        FROM (
+            SELECT personal_id,
+                arg_max(current_location, (timestamp, line)),
+                arg_max(on_shift, (timestamp, line)),
+                max(timestamp) AS timestamp
+            FROM ingest_rows
+            WHERE error IS NULL
+            GROUP BY personal_id
+        ) latest
+        LEFT JOIN green_eyes g USING (personal_id)
+        WHERE g.timestamp IS NULL OR latest.timestamp > g.timestamp
+    """)
+    return _finish(con, rejects_path)
+
+
+LOADERS = {
+    "reports": load_reports,
+    "locations": load_locations,
+}
+
+
+def ingest(con, kind, path, rejects_path=None):
+    """טעינת קובץ דיווחים ("reports") או עדכוני מיקום ("locations") לחיבור con
+
+    הטעינה נשמרת בטרנזקציה אחת. אחרי טעינת דיווחים shift_hours, weekly_hours
+    וטבלאות הסיכום (rollups.py) נבנים מחדש בטרנזקציה נפרדת - סריקת שורות שטרם נשמרו איטית בהרבה.
+    ברירת המחדל לקובץ הדחיות: לצד הקובץ הנטען, עם הסיומת .rejected.csv.
+    """
+    if kind not in LOADERS:
+        raise ValueError(f"סוג טעינה לא מוכר: {kind}")
+    if rejects_path is None:
+        rejects_path = os.path.splitext(path.replace("*", "all"))[0] + ".rejected.csv"
+    with db.transaction(con):
+        result = LOADERS[kind](con, path, rejects_path)
+    if kind == "reports" and result["loaded"]:
+        with db.transaction(con):
+            shift_hours.rebuild(con)
+            rollups.rebuild(con)
+    return result
@@ -0,0 +1,167 @@
+"""תחזוקה תקופתית של מסד הנתונים: גיבוי, בדיקות תקינות, CHECKPOINT ודחיסה
+
+backup  - EXPORT DATABASE לתיקייה חדשה תחת backups/ (קבצי Parquet וסכמה), יחד
+          עם קבצי הארכיון הרשומים בו, מאותה טרנזקציה - תמונת מצב עקבית גם כשהאפליקציה
+          רצה. שחזור: IMPORT DATABASE מהתיקייה לקובץ חדש, והעתקת archive/ שבה חזרה
+          למקומה לצד מסד הנתונים.
+check   - ספירת שורות שמפרות את מה ששאר הקוד מניח (INTEGRITY_CHECKS); 0 בכולן - תקין.
+compact - כתיבת כל מסד הנתונים מחדש לקובץ חדש והחלפת הקיים בו. DELETE ואיפוס
+          הטבלאות מפנים בלוקים לשימוש חוזר אבל לא מקטינים את הקובץ, ורק כתיבה מחדש
+          דוחסת אותו. דורש גישה בלעדית לקובץ - רק כשהאפליקציה אינה רצה (DuckDB
+          לא יפתח קובץ שתהליך אחר מחזיק).
+
+measure מחזיר את גודל הקובץ וזמני כמה משאילתות דף הניהול, להשוואה לפני ואחרי.
+"""
+import os
+import shutil
+import time
+from datetime import timedelta
+
+import archive
+import clock
+import db
+from queries import (
+    FILTER_VALUES_QUERY, REPORTS_ALL, TRACKING_STATE_QUERY, all_reports_summary_query,
+    hours_by_period_query, shift_anomalies_query,
+)
+
+BACKUP_DIR = "backups"
+
+# שם -> (תיאור, שאילתה שמחזירה את מספר השורות הבעייתיות)
+INTEGRITY_CHECKS = {
+    "exit_without_entry": (
+        "יציאות ללא כניסה לפניהן",
+        f"""
+        SELECT COUNT(*) FROM (
+            SELECT report_type,
+                   LAG(report_type) OVER (PARTITION BY personal_id ORDER BY timestamp, report_id) AS previous_type
+            FROM {REPORTS_ALL}
+        )
+        WHERE report_type = 'exit' AND previous_type IS DISTINCT FROM 'entry'
+        """,
+    ),
+    "duplicate_report_ids": (
+        "מזהי דיווח כפולים",
+        f"SELECT COUNT(*) - COUNT(DISTINCT report_id) FROM {REPORTS_ALL}",
+    ),
+    "duplicate_green_eyes": (
+        "עובדים עם יותר משורה אחת ב-green_eyes",
+        "SELECT COUNT(*) FROM (SELECT personal_id FROM green_eyes GROUP BY personal_id HAVING COUNT(*) > 1)",
+    ),
+    "green_eyes_without_history": (
+        "מיקומים ב-green_eyes שאין להם עדכון ב-green_eyes_history",
+        "SELECT COUNT(*) FROM green_eyes ANTI JOIN green_eyes_history USING (personal_id)",
+    ),
+    "shift_hours_mismatch": (
+        "הפרש בין דיווחי הכניסה למשמרות ב-shift_hours (לתיקון: manage.py rebuild-shift-hours)",
+        f"""
+        SELECT abs((SELECT COUNT(*) FROM {REPORTS_ALL} WHERE report_type = 'entry')
+                   - (SELECT COUNT(*) FROM shift_hours))
+        """,
+    ),
+}
+
+
+def backup_dir(db_path):
+    """תיקיית הגיבויים - לצד קובץ מסד הנתונים"""
+    return os.path.join(os.path.dirname(db_path), BACKUP_DIR)
+
+
+def file_size(path):
+    """גודל קובץ מסד הנתונים ביחד עם ה-WAL שלו, בבתים"""
+    return sum(os.path.getsize(name) for name in (path, path + ".wal") if os.path.exists(name))
+
+
+def timed_queries():
+    """(שם, שאילתה, פרמטרים) של שאילתות הניהול שנמדדות לפני ואחרי התחזוקה"""
+    today = clock.today()
+    no_filters = dict.fromkeys(("report_type", "rahal", "work_location", "personal_id", "date_from", "date_to"))
+    return [
+        ("all_reports_summary", *all_reports_summary_query(no_filters)),
+        ("filter_values", FILTER_VALUES_QUERY, None),
+        ("hours_by_month_year", hours_by_period_query("month"), [today - timedelta(days=365), today]),
+        ("shift_anomalies_month", *shift_anomalies_query(
+            clock.start_of_day(today - timedelta(days=30)), clock.start_of_day(today + timedelta(days=1))
+        )),
+        ("tracking_state", TRACKING_STATE_QUERY, None),
+    ]
+
+
+def measure(database, repeat=3):
+    """{"bytes": גודל הקובץ, "queries": {שם: הזמן הטוב מ-repeat הרצות בשניות}}"""
+    timings = {}
+    for name, query, params in timed_queries():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            database.read(query, params, label=f"maintenance_{name}")
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    return {"bytes": file_size(database.path), "queries": timings}
+
+
+def backup(database, directory):
+    """גיבוי מלא לתיקייה חדשה תחת directory; מחזיר (נתיב, גודל בבתים)"""
+    target = os.path.join(directory, clock.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(directory, exist_ok=True)
+    cursor = database.cursor()
+    with db.transaction(cursor):
+        paths = [path for (path,) in cursor.execute("SELECT path FROM report_archive").fetchall()]
+        escaped = target.replace("'", "''")
+        cursor.execute(f"EXPORT DATABASE '{escaped}' (FORMAT parquet, COMPRESSION zstd)")
+
+    # קבצי הארכיון אינם משתנים אחרי שנכתבו, ולכן מספיק להעתיק את אלה שהיו רשומים
+    source = archive.archive_dir(database.path)
+    for path in paths:
+        copy = os.path.join(target, archive.ARCHIVE_DIR, os.path.relpath(path, source))
+        os.makedirs(os.path.dirname(copy), exist_ok=True)
+        shutil.copy2(path, copy)
+
+    size = sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(target) for name in files
+    )
+    return target, size
+
+
+def check(database):
+    """[(שם, תיאור, מספר שורות)] לכל בדיקת תקינות, ועוד קבצי ארכיון חסרים"""
+    results = [
+        (name, label, database.read(query, label=f"check_{name}")[0][0])
+        for name, (label, query) in INTEGRITY_CHECKS.items()
+    ]
+    paths = [path for (path,) in database.read("SELECT path FROM report_archive", label="check_archive_files")]
+    results.append((
+        "missing_archive_files", "קבצי ארכיון רשומים שאינם קיימים",
+        sum(not os.path.exists(path) for path in paths),
+    ))
+    return results
+
+
+def checkpoint(database):
+    """כתיבת ה-WAL לקובץ עצמו ושחרור הבלוקים של שורות שנמחקו לשימוש חוזר"""
+    database.cursor().execute("CHECKPOINT")
+
+
+def compact(path):
+    """כתיבה מחדש של מסד הנתונים לקובץ חדש במקום הקיים (אין לפתוח את הקובץ במקביל)"""
+    target = path + ".compact"
+    for name in (target, target + ".wal"):
+        if os.path.exists(name):
+            os.remove(name)
+
+    con = db.connect(path)
+    try:
+        source = con.execute("SELECT current_database()").fetchone()[0]
+        escaped = target.replace("'", "''")
+        con.execute(f"ATTACH '{escaped}' AS compacted")
+        con.execute(f"COPY FROM DATABASE {source} TO compacted")
+        con.execute("DETACH compacted")
+    finally:
+        con.close()
+
+    # אחרי הסגירה כל מה שב-WAL כבר בקובץ; WAL שנשאר היה מוחל על הקובץ החדש
+    if os.path.exists(path + ".wal") or os.path.exists(target + ".wal"):
+        os.remove(target)
+        raise RuntimeError("קובץ WAL נשאר אחרי הסגירה - מסד הנתונים פתוח בתהליך אחר?")
+    os.replace(target, path)
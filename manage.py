@@ -0,0 +1,136 @@
+"""פקודות תחזוקה למסד הנתונים, להרצה מחוץ לאפליקציה
+
+    python manage.py rebuild-shift-hours [--db reports.db]
+    python manage.py import-roster roster.csv [--db reports.db]
+    python manage.py archive-reports [--keep-months 3] [--db reports.db]
+    python manage.py ingest {reports,locations} path [--rejects rejected.csv] [--db reports.db]
+    python manage.py maintenance [--no-backup] [--compact] [--db reports.db]
+"""
+import argparse
+import time
+
+import archive
+import clock
+import db
+import ingest
+import maintenance
+import rollups
+import shift_hours
+
+
+def rebuild_shift_hours(args):
+    con = db.connect(args.db)
+    with db.transaction(con):
+        count = shift_hours.rebuild(con)
+        rollups.rebuild(con)
+    print(f"shift_hours נבנתה מחדש: {count} משמרות")
+
+
+def import_roster(args):
+    con = db.connect(args.db)
+    with db.transaction(con):
+        count = db.import_roster(con, args.path)
+    print(f"רשימת העובדים נטענה: {count} עובדים")
+
+
+def archive_reports(args):
+    con = db.connect(args.db)
+    directory = archive.archive_dir(args.db)
+    with db.transaction(con):
+        archived = archive.archive_reports(con, directory, archive.cutoff(clock.today(), args.keep_months))
+    paths = [path for (path,) in con.execute("SELECT path FROM report_archive").fetchall()]
+    archive.remove_orphans(directory, paths)
+    for month, rows in archived:
+        print(f"{month}: {rows} דיווחים הועברו לארכיון")
+    if not archived:
+        print("אין חודשים סגורים להעברה לארכיון")
+
+
+def ingest_file(args):
+    started = time.perf_counter()
+    con = db.connect(args.db)
+    result = ingest.ingest(con, args.kind, args.path, args.rejects)
+    print(f"נטענו {result['loaded']} שורות ב-{time.perf_counter() - started:.1f} שניות")
+    if result["rejected"]:
+        print(f"{result['rejected']} שורות נדחו - פירוט ב-{result['rejects_path']}")
+
+
+def maintain(args):
+    database = db.ConnectionManager(args.db)
+    before = maintenance.measure(database)
+    steps = {}
+
+    if not args.no_backup:
+        started = time.perf_counter()
+        path, size = maintenance.backup(database, maintenance.backup_dir(args.db))
+        steps["backup"] = time.perf_counter() - started
+        print(f"גיבוי: {path} ({size / 1024 / 1024:.1f} MB)")
+
+    started = time.perf_counter()
+    for name, label, count in maintenance.check(database):
+        print(f"{'תקין' if not count else f'{count} שורות'}\t{label} ({name})")
+    steps["check"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    maintenance.checkpoint(database)
+    steps["checkpoint"] = time.perf_counter() - started
+
+    if args.compact:
+        database.close()
+        started = time.perf_counter()
+        maintenance.compact(args.db)
+        steps["compact"] = time.perf_counter() - started
+        database = db.ConnectionManager(args.db)
+
+    after = maintenance.measure(database)
+    database.close()
+
+    print("\n" + ", ".join(f"{step} {seconds:.1f}s" for step, seconds in steps.items()))
+    print(f"גודל הקובץ: {before['bytes'] / 1024 / 1024:.1f} MB -> {after['bytes'] / 1024 / 1024:.1f} MB")
+    print(f"{'query':<24} {'before [ms]':>12} {'after [ms]':>12}")
+    for name, seconds in before["queries"].items():
+        print(f"{name:<24} {seconds * 1000:>12.1f} {after['queries'][name] * 1000:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="פקודות תחזוקה למסד הנתונים")
+    parser.add_argument("--db", default=db.DB_PATH, help="נתיב קובץ מסד הנתונים")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-shift-hours", help="בנייה מחדש של shift_hours, weekly_hours וטבלאות הסיכום מ-reports")
+    rebuild.set_defaults(handler=rebuild_shift_hours)
+
+    roster = commands.add_parser("import-roster", help="החלפת רשימת העובדים בתוכן קובץ CSV")
+    roster.add_argument("path", help="קובץ CSV עם העמודות personal_id, name, rahal, locations")
+    roster.set_defaults(handler=import_roster)
+
+    archive_command = commands.add_parser(
+        "archive-reports", help="העברת חודשים סגורים מ-reports לארכיון Parquet"
+    )
+    archive_command.add_argument("--keep-months", type=int, default=archive.KEEP_MONTHS,
+                                 help="מספר החודשים האחרונים (כולל הנוכחי) שנשארים ב-reports")
+    archive_command.set_defaults(handler=archive_reports)
+
+    ingest_command = commands.add_parser(
+        "ingest", help="טעינת דיווחים או עדכוני מיקום מקובץ CSV, Parquet או JSONL (כשהאפליקציה אינה רצה)"
+    )
+    ingest_command.add_argument("kind", choices=sorted(ingest.LOADERS))
+    ingest_command.add_argument("path", help="הקובץ לטעינה, או תבנית glob של כמה קבצים")
+    ingest_command.add_argument("--rejects", help="קובץ CSV לשורות שנדחו (ברירת מחדל לצד הקובץ הנטען)")
+    ingest_command.set_defaults(handler=ingest_file)
+
+    maintenance_command = commands.add_parser(
+        "maintenance",
+        help="גיבוי, בדיקות תקינות ו-CHECKPOINT, עם גודל הקובץ וזמני שאילתות לפני ואחרי",
+    )
+    maintenance_command.add_argument("--no-backup", action="store_true", help="ללא גיבוי ל-backups/")
+    maintenance_command.add_argument("--compact", action="store_true",
+                                     help="כתיבת הקובץ מחדש כדי להקטין אותו (כשהאפליקציה אינה רצה)")
+    maintenance_command.set_defaults(handler=maintain)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
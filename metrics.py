@@ -0,0 +1,98 @@
+"""מדידת זמנים של השאילתות והעמודים
+
+כל שאילתה שרצה מול מסד הנתונים (ConnectionManager.read ו-write), כל הרצה של
+עמוד וכל רענון אוטומטי של חלק מעמוד נרשמים עם תווית, משך, מספר שורות והאם
+נכשלו. הרישום נשמר בזיכרון בחוצץ מעגלי של MAX_SAMPLES המדידות האחרונות, ומוצג
+בלשונית הביצועים בדף הניהול.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_SAMPLES = 5000
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(values, fraction):
+    """האחוזון של רשימה ממוינת (nearest-rank)"""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def explainable(query):
+    """האם אפשר להריץ את השאילתה שוב עם EXPLAIN ANALYZE - רק שאילתות קריאה"""
+    return query is not None and query.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+class Metrics:
+    """המדידות האחרונות של התהליך; בטוח לשימוש מכמה תהליכונים במקביל"""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)
+
+    def record(self, kind, label, seconds, rows=None, error=None, query=None, params=None):
+        """רישום מדידה אחת; kind הוא "query", "page" או "fragment" (רענון של חלק מעמוד)"""
+        sample = {
+            "kind": kind,
+            "label": label,
+            "seconds": seconds,
+            "rows": rows,
+            "error": error,
+            "query": query,
+            "params": tuple(params or ()),
+            "time": time.time(),
+        }
+        with self._lock:
+            self._samples.append(sample)
+
+    @contextmanager
+    def timed(self, kind, label):
+        """מדידת משך הבלוק; חריגה נרשמת כשגיאה ונזרקת הלאה
+
+        st.stop ו-st.rerun אינם יורשים מ-Exception, ולכן הרצת עמוד שנקטעה בהם
+        נרשמת כרגיל.
+        """
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(kind, label, time.perf_counter() - started, error=error)
+
+    def samples(self):
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self):
+        """סיכום לכל תווית: מספר הרצות, שגיאות, אחוזוני משך ומספר השורות הממוצע"""
+        groups = {}
+        for sample in self.samples():
+            groups.setdefault((sample["kind"], sample["label"]), []).append(sample)
+        summary = []
+        for (kind, label), samples in groups.items():
+            seconds = sorted(sample["seconds"] for sample in samples)
+            rows = [sample["rows"] for sample in samples if sample["rows"] is not None]
+            summary.append({
+                "kind": kind,
+                "label": label,
+                "count": len(samples),
+                "errors": sum(sample["error"] is not None for sample in samples),
+                **{f"p{round(fraction * 100)}": percentile(seconds, fraction) for fraction in PERCENTILES},
+                "max": seconds[-1],
+                "rows": sum(rows) / len(rows) if rows else None,
+            })
+        return sorted(summary, key=lambda row: row["p95"], reverse=True)
+
+    def slowest(self, count=10, kind="query"):
+        """המדידות האיטיות ביותר, מהאיטית לפחות איטית"""
+        samples = [sample for sample in self.samples() if sample["kind"] == kind]
+        return sorted(samples, key=lambda sample: sample["seconds"], reverse=True)[:count]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
@@ -0,0 +1,52 @@
+"""אינדקס בזיכרון של המשמרות הפתוחות - מ.א -> (מיקום עבודה, זמן הכניסה)
+
+נטען מ-shift_hours (משמרות ללא יציאה) בעליית האפליקציה ומתעדכן עם כל דיווח
+שנשלח, כך שטופס הדיווח בודק ומציג את המשמרת הפתוחה בלי לסרוק את הטבלאות.
+"""
+import threading
+
+from queries import OPEN_SHIFTS_QUERY
+
+
+class OpenShifts:
+    """המשמרות הפתוחות של כל העובדים; בטוח לשימוש מכמה תהליכונים במקביל"""
+
+    def __init__(self, database):
+        self._lock = threading.Lock()
+        self._shifts = {}
+        self.reload(database)
+
+    def reload(self, database):
+        """טעינה מחדש מ-shift_hours, למשל אחרי איפוס הדיווחים"""
+        shifts = {
+            personal_id: (work_location, entry_timestamp)
+            for personal_id, work_location, entry_timestamp in database.read(OPEN_SHIFTS_QUERY, label="open_shifts")
+        }
+        with self._lock:
+            self._shifts = shifts
+
+    def get(self, personal_id):
+        """המשמרת הפתוחה של העובד כ-(מיקום עבודה, זמן הכניסה), או None"""
+        with self._lock:
+            return self._shifts.get(personal_id)
+
+    def open(self, personal_id, work_location, timestamp):
+        """פתיחת משמרת; מחזיר False אם כבר יש לעובד משמרת פתוחה"""
+        with self._lock:
+            if personal_id in self._shifts:
+                return False
+            self._shifts[personal_id] = (work_location, timestamp)
+            return True
+
+    def close(self, personal_id):
+        """סגירת המשמרת הפתוחה של העובד; מחזיר אותה, או None אם לא הייתה"""
+        with self._lock:
+            return self._shifts.pop(personal_id, None)
+
+    def restore(self, personal_id, shift):
+        """ביטול open/close כשההגשה לא נשמרה בתור"""
+        with self._lock:
+            if shift is None:
+                self._shifts.pop(personal_id, None)
+            else:
+                self._shifts[personal_id] = shift
@@ -0,0 +1,379 @@
+"""שאילתות הקריאה של דפי הניהול"""
+from datetime import timedelta
+
+import clock
+
+# כל הדיווחים - הטבלה reports ביחד עם החודשים שהועברו לארכיון (ראו archive.py).
+# לכל שורה עמודת month (YYYY-MM בשעון ישראל), שסינון לפיה מדלג על קבצי הארכיון שמחוץ לטווח
+REPORTS_ALL = "reports_all"
+
+# משך משמרת בשעות - ההפרש בין זמני הכניסה והיציאה עצמם (TIMESTAMPTZ), ולכן נכון גם
+# למשמרות של כמה ימים ולמעבר שעון קיץ/חורף, ושומר על דיוק של שניות
+HOURS_WORKED_SQL = "epoch(exit_timestamp - entry_timestamp) / 3600.0"
+
+# הצמדת כניסות ליציאות - שורה לכל כניסה
+# כל כניסה מוצמדת ליציאה הראשונה שאחריה של אותו עובד ב-ASOF JOIN אחד:
+# שני הצדדים ממוינים פעם אחת לפי personal_id ו-timestamp וממוזגים במעבר יחיד,
+# במקום שתי תת-שאילתות מתואמות לכל שורת כניסה
+def paired_shifts_sql(source=REPORTS_ALL):
+    """המשמרות מהדיווחים שב-source - ברירת המחדל כוללת את הארכיון"""
+    return f"""
+SELECT
+    personal_id,
+    work_location,
+    entry_timestamp,
+    start_date,
+    start_time,
+    exit_timestamp,
+    end_date,
+    end_time,
+    {HOURS_WORKED_SQL} as hours_worked
+FROM (
+    SELECT
+        e.personal_id,
+        e.work_location,
+        e.timestamp as entry_timestamp,
+        e.start_date,
+        e.start_time,
+        x.timestamp as exit_timestamp,
+        x.end_date,
+        x.end_time
+    FROM (SELECT * FROM {source} WHERE report_type = 'entry') e
+    ASOF LEFT JOIN (SELECT * FROM {source} WHERE report_type = 'exit') x
+    ON e.personal_id = x.personal_id
+    AND x.timestamp > e.timestamp
+)
+"""
+
+
+# סיכום השעות השבועי, נקרא מהטבלה המצטברת weekly_hours (ראו shift_hours.py)
+WEEKLY_HOURS_QUERY = """
+SELECT
+    personal_id,
+    work_locations,
+    total_shifts,
+    completed_shifts,
+    ROUND(total_hours, 2) as total_hours,
+    ROUND(total_hours / NULLIF(completed_shifts, 0), 2) as avg_hours_per_shift,
+    first_shift_date,
+    last_shift_date
+FROM weekly_hours
+WHERE week_start = ?
+ORDER BY total_hours DESC
+"""
+
+# המשמרת הפתוחה האחרונה של כל עובד (כניסה שעדיין אין אחריה יציאה)
+OPEN_SHIFTS_QUERY = """
+SELECT personal_id, arg_max(work_location, entry_timestamp), max(entry_timestamp)
+FROM shift_hours
+WHERE exit_timestamp IS NULL
+GROUP BY personal_id
+"""
+
+# משמרת ארוכה מזה נחשבת חריגה (כנראה יציאה שנשכחה)
+MAX_SHIFT_HOURS = 16
+
+ANOMALY_LABELS = {
+    'missing_exit': 'כניסה ללא יציאה',
+    'exit_without_entry': 'יציאה ללא כניסה',
+    'overlapping_entry': 'כניסה חופפת (כניסה נוספת לפני יציאה)',
+    'long_shift': 'משמרת ארוכה מהמותר',
+}
+
+# כל הדיווחים של עובד מסודרים לפי זמן, וכל דיווח נבדק מול הדיווח שלפניו ושאחריו.
+# נסרקים רק הדיווחים מהחודש שלפני הטווח ואילך, כדי לא לקרוא את כל הארכיון; דיווח
+# שהקודם לו מוקדם מזה נבדק כאילו אין לפניו דיווח
+_SHIFT_ANOMALIES_SQL = f"""
+WITH ordered AS (
+    SELECT
+        personal_id,
+        report_type,
+        timestamp,
+        LAG(report_type) OVER w AS previous_type,
+        LEAD(report_type) OVER w AS next_type,
+        epoch(COALESCE(LEAD(timestamp) OVER w, now()) - timestamp) / 3600.0 AS hours_to_next
+    FROM {REPORTS_ALL}
+    WHERE timestamp >= ? AND month >= ?
+    WINDOW w AS (PARTITION BY personal_id ORDER BY timestamp, report_id)
+),
+anomalies AS (
+    SELECT *,
+        CASE
+            WHEN report_type = 'exit' AND (previous_type IS NULL OR previous_type = 'exit') THEN 'exit_without_entry'
+            WHEN report_type = 'entry' AND next_type = 'entry' THEN 'overlapping_entry'
+            WHEN report_type = 'entry' AND next_type IS NULL AND hours_to_next > ? THEN 'missing_exit'
+            WHEN report_type = 'entry' AND next_type = 'exit' AND hours_to_next > ? THEN 'long_shift'
+        END AS anomaly
+    FROM ordered
+    WHERE timestamp >= ? AND timestamp < ?
+)
+SELECT
+    personal_id,
+    CASE anomaly {" ".join(f"WHEN '{key}' THEN '{label}'" for key, label in ANOMALY_LABELS.items())} END,
+    strftime(timestamp, '%d/%m/%Y %H:%M'),
+    CASE WHEN report_type = 'entry' THEN ROUND(hours_to_next, 2) END
+FROM anomalies
+WHERE anomaly IS NOT NULL
+ORDER BY timestamp
+"""
+
+
+def shift_anomalies_query(date_from, date_to, max_hours=MAX_SHIFT_HOURS):
+    """חריגות בדיווחים שנשלחו בטווח [date_from, date_to): מחזיר (שאילתה, פרמטרים)
+
+    כל שורה: מ.א, סוג החריגה, זמן הדיווח, ומשך המשמרת בשעות (עד היציאה, או עד עכשיו אם אין יציאה).
+    """
+    first_of_month = date_from.astimezone(clock.ISRAEL).date().replace(day=1)
+    scan_from = clock.start_of_day((first_of_month - timedelta(days=1)).replace(day=1))
+    return _SHIFT_ANOMALIES_SQL, [scan_from, month_of(scan_from), max_hours, max_hours, date_from, date_to]
+
+
+def month_of(timestamp):
+    """ערך עמודת month של REPORTS_ALL עבור זמן נתון"""
+    return timestamp.astimezone(clock.ISRAEL).strftime("%Y-%m")
+
+
+# דליי הזמן לסיכום שעות בטווח תאריכים - השבוע מתחיל ביום ראשון (week_start של shift_hours)
+HOURS_PERIODS = {
+    "week": "week_start",
+    "month": "CAST(date_trunc('month', start_date) AS DATE)",
+}
+
+
+def hours_by_period_query(period):
+    """שעות לכל עובד ולכל שבוע/חודש שבו התחילו משמרות בטווח [?, ?], בשאילתה מקובצת אחת"""
+    return f"""
+    SELECT
+        personal_id,
+        {HOURS_PERIODS[period]} AS period,
+        COUNT(*) as total_shifts,
+        COUNT(hours_worked) as completed_shifts,
+        ROUND(SUM(COALESCE(hours_worked, 0)), 2) as total_hours
+    FROM shift_hours
+    WHERE start_date BETWEEN ? AND ?
+    GROUP BY personal_id, period
+    ORDER BY period, personal_id
+    """
+
+
+# המעקב החי (tracking.py): המיקום הנוכחי של כל עובד וה-event_id האחרון בהיסטוריה,
+# מאותה טרנזקציה - העדכונים שאחריו נקראים ב-TRACKING_CHANGES_QUERY
+TRACKING_STATE_QUERY = """
+SELECT personal_id, current_location, on_shift, timestamp,
+       (SELECT COALESCE(MAX(event_id), 0) FROM green_eyes_history)
+FROM green_eyes
+"""
+
+# העדכון האחרון של כל עובד מאז event_id נתון, ומספר השורות ב-green_eyes.
+# ההיסטוריה נשמרת לפי סדר הזמן, כך שהסינון על event_id מדלג על כל הבלוקים הישנים.
+# תמיד שורה אחת: השינויים כרשימה (או NULL אם אין), כדי שגם בלי שינויים יוחזר המספר
+TRACKING_CHANGES_QUERY = """
+WITH changes AS (
+    SELECT personal_id,
+           arg_max(current_location, (timestamp, event_id)) AS current_location,
+           arg_max(on_shift, (timestamp, event_id)) AS on_shift,
+           max(timestamp) AS timestamp,
+           max(event_id) AS event_id
+    FROM green_eyes_history
+    WHERE event_id > ?
+    GROUP BY personal_id
+)
+SELECT (SELECT COUNT(*) FROM green_eyes),
+       (SELECT LIST(changes) FROM changes)
+"""
+
+# עובדים מרשימת העובדים שאין להם עדכון היכן אני כעת
+NOT_REPORTED_QUERY = """
+SELECT personal_id, name, rahal
+FROM roster
+ANTI JOIN green_eyes USING (personal_id)
+ORDER BY rahal, personal_id
+"""
+
+# היכן היה כל עובד בזמן נתון: העדכון האחרון שלו בהיסטוריה עד אותו זמן.
+# השורות נשמרות לפי סדר הזמן, כך שהסינון מדלג על הבלוקים המאוחרים יותר.
+# האחרון נקבע לפי הזמן ורק אז לפי event_id - עדכונים שנטענו מקובץ (ingest.py)
+# מקבלים מזהים חדשים גם כשהם ישנים מהעדכונים שכבר שמורים
+TRACKING_AS_OF_QUERY = """
+SELECT personal_id,
+       arg_max(current_location, (timestamp, event_id)),
+       arg_max(on_shift, (timestamp, event_id)),
+       strftime(max(timestamp), '%d/%m/%Y %H:%M') as report_datetime
+FROM green_eyes_history
+WHERE timestamp <= ?
+GROUP BY personal_id
+ORDER BY max(timestamp) DESC
+"""
+
+# עובדים שעד הזמן הנתון לא היה להם אף עדכון היכן אני כעת
+NOT_REPORTED_AS_OF_QUERY = """
+SELECT personal_id, name, rahal
+FROM roster
+ANTI JOIN (SELECT personal_id FROM green_eyes_history WHERE timestamp <= ?) USING (personal_id)
+ORDER BY rahal, personal_id
+"""
+
+# כל הדיווחים - משמרות, בעמודים
+PAGE_SIZE = 50
+
+REPORT_TYPE_LABELS = {
+    'entry': '🟢 כניסה',
+    'exit': '🔴 יציאה',
+}
+
+ALL_REPORTS_COLUMNS = f"""
+    CASE report_type {" ".join(f"WHEN '{key}' THEN '{label}'" for key, label in REPORT_TYPE_LABELS.items())} END as report_type,
+    personal_id,
+    rahal,
+    work_location,
+    replacing_who,
+    replacement_person,
+    reports_count,
+    special_notes,
+    start_date,
+    start_time,
+    end_date,
+    end_time,
+    strftime(timestamp, '%d/%m/%Y %H:%M') as report_datetime
+"""
+
+
+# כותרות העמודות של ALL_REPORTS_COLUMNS, לתצוגה ולקבצי הייצוא
+ALL_REPORTS_LABELS = [
+    'סוג דיווח', 'מ.א', 'רח"ל', 'מיקום עבודה', 'מי חפף אותי',
+    'את מי חפפתי', 'מספר דיווחים', 'הערות מיוחדות',
+    'תאריך תחילה', 'שעת תחילה', 'תאריך סיום', 'שעת סיום', 'זמן דיווח'
+]
+
+
+def report_filters_sql(filters, include_type=True):
+    """תנאי WHERE ופרמטרים עבור מסנני הדיווחים
+
+    filters הוא מילון עם המפתחות report_type, date_from, date_to, personal_id,
+    rahal, work_location; ערך None פירושו ללא סינון. date_from/date_to הם
+    datetime עם אזור זמן - תחילת היום הראשון ותחילת היום שאחרי האחרון.
+    התנאים מיועדים ל-REPORTS_ALL: טווח תאריכים מסנן גם לפי month.
+    """
+    conditions = []
+    params = []
+    if include_type and filters.get("report_type"):
+        conditions.append("report_type = ?")
+        params.append(filters["report_type"])
+    if filters.get("date_from"):
+        conditions.append("timestamp >= ? AND month >= ?")
+        params += [filters["date_from"], month_of(filters["date_from"])]
+    if filters.get("date_to"):
+        conditions.append("timestamp < ? AND month <= ?")
+        params += [filters["date_to"], month_of(filters["date_to"] - timedelta(microseconds=1))]
+    for column in ("personal_id", "rahal", "work_location"):
+        if filters.get(column):
+            conditions.append(f"{column} = ?")
+            params.append(filters[column])
+    return " AND ".join(conditions) or "TRUE", params
+
+
+def all_reports_page_query(filters, after=None, limit=PAGE_SIZE):
+    """שאילתת עמוד אחד, מהחדש לישן, בעימוד לפי מפתח (keyset)
+
+    after הוא (timestamp, report_id) של השורה האחרונה בעמוד הקודם. שתי העמודות
+    האחרונות בכל שורה הן המפתח הזה, לשימוש כ-after של העמוד הבא.
+    """
+    where, params = report_filters_sql(filters)
+    if after is not None:
+        timestamp, report_id = after
+        if timestamp is None:
+            where += " AND timestamp IS NULL AND report_id < ?"
+            params += [report_id]
+        else:
+            where += " AND (timestamp < ? OR (timestamp = ? AND report_id < ?) OR timestamp IS NULL)"
+            params += [timestamp, timestamp, report_id]
+    query = f"""
+    SELECT {ALL_REPORTS_COLUMNS}, timestamp, report_id
+    FROM {REPORTS_ALL}
+    WHERE {where}
+    ORDER BY timestamp DESC NULLS LAST, report_id DESC
+    LIMIT {int(limit)}
+    """
+    return query, params
+
+
+def export_reports_query(filters):
+    """כל הדיווחים העונים למסננים, מהחדש לישן, עם כותרות העמודות בעברית
+
+    זמן הדיווח נשאר בעמודת TIMESTAMPTZ ולא כמחרוזת, כדי שיישמר כזמן בקובץ Parquet.
+    """
+    where, params = report_filters_sql(filters)
+    columns = [
+        'report_type', 'personal_id', 'rahal', 'work_location', 'replacing_who',
+        'replacement_person', 'reports_count', 'special_notes',
+        'start_date', 'start_time', 'end_date', 'end_time', 'timestamp'
+    ]
+    labels = [label.replace('"', '""') for label in ALL_REPORTS_LABELS]
+    select = ", ".join(f'{column} AS "{label}"' for column, label in zip(columns, labels))
+    query = f"""
+    SELECT {select}
+    FROM (SELECT {ALL_REPORTS_COLUMNS}, timestamp, report_id FROM {REPORTS_ALL} WHERE {where})
+    ORDER BY timestamp DESC NULLS LAST, report_id DESC
+    """
+    return query, params
+
+
+def all_reports_summary_query(filters):
+    """ספירת הדיווחים לפי סוג בשאילתה אחת; מתעלמת ממסנן הסוג כדי להציג את שניהם"""
+    where, params = report_filters_sql(filters, include_type=False)
+    query = f"""
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE report_type = 'entry'),
+        COUNT(*) FILTER (WHERE report_type = 'exit')
+    FROM {REPORTS_ALL}
+    WHERE {where}
+    """
+    return query, params
+
+
+# ערכים קיימים למסנני רח"ל ומיקום עבודה
+FILTER_VALUES_QUERY = f"""
+SELECT
+    LIST(DISTINCT rahal ORDER BY rahal) FILTER (WHERE rahal IS NOT NULL),
+    LIST(DISTINCT work_location ORDER BY work_location) FILTER (WHERE work_location IS NOT NULL)
+FROM {REPORTS_ALL}
+"""
+
+# ניתוח תפעולי - נקרא מטבלאות הסיכום (ראו rollups.py)
+# שעות משמרת לכל מיקום, יום בשבוע (1 = ראשון) ושעה, בין שני תאריכים (כולל),
+# והמספר הגבוה ביותר של משמרות פעילות באותה שעה
+LOCATION_LOAD_QUERY = """
+SELECT work_location,
+       CAST(dayofweek(day) AS INTEGER) + 1 AS weekday,
+       hour,
+       SUM(staffed_hours) AS staffed_hours,
+       MAX(shifts) AS peak_shifts
+FROM location_hourly
+WHERE day BETWEEN ? AND ?
+GROUP BY ALL
+ORDER BY work_location, weekday, hour
+"""
+
+# משמרות, עובדים ודיווחים לכל רח"ל ושבוע, לשבועות שמתחילים בין שני תאריכים (כולל)
+RAHAL_WEEKLY_QUERY = """
+SELECT rahal,
+       week_start,
+       shifts,
+       employees,
+       reports_total,
+       ROUND(reports_total / shifts, 2) AS avg_reports_per_shift
+FROM rahal_weekly
+WHERE week_start BETWEEN ? AND ?
+ORDER BY week_start, rahal
+"""
+
+ROSTER_SIZE_QUERY = "SELECT COUNT(*) FROM roster"
+
+# אפשרויות הבחירה בטופס הדיווח מרשימת העובדים
+ROSTER_CHOICES_QUERY = """
+SELECT
+    LIST(DISTINCT rahal ORDER BY rahal) FILTER (WHERE rahal IS NOT NULL),
+    (SELECT LIST(DISTINCT location ORDER BY location) FROM (SELECT unnest(locations) AS location FROM roster))
+FROM roster
+"""
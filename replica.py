@@ -0,0 +1,166 @@
+"""עותק לקריאה בלבד של מסד הנתונים לדף הניהול
+
+שאילתות הניהול (סיכומי שעות, כל הדיווחים, ייצוא, ניתוח) רצות מול עותק של מסד
+הנתונים שמתחדש כל REFRESH_SECONDS שניות, ולא מול הקובץ הראשי שאליו נשמרים
+הדיווחים. שאילתה כבדה תופסת כך רק את העותק: טרנזקציית קריאה ארוכה על הקובץ
+הראשי הייתה מעכבת את ה-CHECKPOINT שלו ומתחרה בשמירת ההגשות.
+
+העותק נוצר ב-COPY FROM DATABASE בטרנזקציה אחת (תמונת מצב עקבית), לקובץ חדש
+לצד הקובץ הראשי, ונפתח כמופע DuckDB נפרד לקריאה בלבד. קריאות שכבר רצות על
+העותק הקודם מסתיימות בו, והוא נסגר ונמחק אחריהן. עותק חדש נוצר רק אם משהו
+נכתב מאז הקודם. עד שהעותק הראשון מוכן, ועם REPLICA_REFRESH_SECONDS=0 בקובץ
+.env, הקריאות רצות על הקובץ הראשי.
+"""
+import glob
+import logging
+import os
+import threading
+import time
+
+import cache
+import db
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = 60
+
+
+class _Snapshot:
+    def __init__(self, path, database):
+        self.path = path
+        self.database = database
+        self.created_at = time.time()
+        self.readers = 0
+        self.retired = False
+
+
+class Replica:
+    """מקור הקריאה של דף הניהול - מחליף את db.ConnectionManager בקריאות (read)"""
+
+    def __init__(self, database, query_cache, refresh_seconds=REFRESH_SECONDS):
+        # database הוא db.ConnectionManager של הקובץ הראשי, ו-query_cache המטמון שלו
+        self._database = database
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._snapshot = None
+        self._sequence = 0
+        # זמן הכתיבה הראשונה שעוד לא נמצאת בעותק (None - העותק מעודכן)
+        self._changed_at = time.time()
+        self._stopped = threading.Event()
+        self.metrics = database.metrics
+
+        if refresh_seconds > 0:
+            # למטמון של העותק אין צורך בפסילה לפי טבלה - הוא מתרוקן בכל החלפת עותק
+            self.cache = cache.QueryCache(self)
+            for path in glob.glob(glob.escape(database.path) + ".replica-*"):
+                os.remove(path)
+            self._thread = threading.Thread(target=self._run, name="replica-refresh", daemon=True)
+            self._thread.start()
+        else:
+            self.cache = query_cache
+
+    @property
+    def enabled(self):
+        return self.refresh_seconds > 0
+
+    def read(self, query, params=None, label="query"):
+        """כמו database.read, על העותק הנוכחי (או על הקובץ הראשי אם אין עדיין עותק)"""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                snapshot.readers += 1
+        if snapshot is None:
+            return self._database.read(query, params, label)
+        try:
+            return snapshot.database.read(query, params, label)
+        finally:
+            with self._lock:
+                snapshot.readers -= 1
+                close = snapshot.retired and snapshot.readers == 0
+            if close:
+                self._close(snapshot)
+
+    def changed(self, *tables):
+        """סימון שנכתבו נתונים לקובץ הראשי; לקרוא אחרי שהכתיבה נשמרה"""
+        with self._lock:
+            if self._changed_at is None:
+                self._changed_at = time.time()
+
+    def staleness(self):
+        """(זמן יצירת העותק, שניות מאז הכתיבה הראשונה שאינה בו), או None אם אין עותק"""
+        with self._lock:
+            if self._snapshot is None:
+                return None
+            changed_at = self._changed_at
+            return self._snapshot.created_at, 0 if changed_at is None else time.time() - changed_at
+
+    def refresh(self):
+        """יצירת עותק חדש מהקובץ הראשי והחלפת הנוכחי בו"""
+        if not self.enabled:
+            return
+        with self._refresh_lock:
+            with self._lock:
+                self._sequence += 1
+                path = f"{self._database.path}.replica-{self._sequence}"
+                changed_at = self._changed_at
+                self._changed_at = None
+            try:
+                self._copy(path)
+                snapshot = _Snapshot(
+                    path, db.ConnectionManager(path, read_only=True, shared_metrics=self._database.metrics)
+                )
+            except Exception:
+                with self._lock:
+                    if self._changed_at is None:
+                        self._changed_at = changed_at
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+
+            with self._lock:
+                previous, self._snapshot = self._snapshot, snapshot
+                close = previous is not None and previous.readers == 0
+                if previous is not None:
+                    previous.retired = True
+            self.cache.clear()
+            if close:
+                self._close(previous)
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            self._close(snapshot)
+
+    def _copy(self, path):
+        """העתקת כל מסד הנתונים הראשי לקובץ path בטרנזקציה אחת"""
+        started = time.perf_counter()
+        cursor = self._database.cursor()
+        source = cursor.execute("SELECT current_database()").fetchone()[0]
+        target = path.replace("'", "''")
+        cursor.execute(f"ATTACH '{target}' AS replica_next")
+        try:
+            with db.transaction(cursor):
+                cursor.execute(f"COPY FROM DATABASE {source} TO replica_next")
+        finally:
+            cursor.execute("DETACH replica_next")
+        self._database.metrics.record("query", "replica_refresh", time.perf_counter() - started)
+
+    def _close(self, snapshot):
+        snapshot.database.close()
+        os.remove(snapshot.path)
+        if os.path.exists(snapshot.path + ".wal"):
+            os.remove(snapshot.path + ".wal")
+
+    def _run(self):
+        # העותק הראשון נוצר מיד, והבאים רק אחרי כתיבה
+        while not self._stopped.is_set():
+            try:
+                if self._changed_at is not None:
+                    self.refresh()
+            except Exception:
+                # הקריאות ממשיכות מהעותק הקודם, וננסה שוב בסבב הבא
+                logger.exception("שגיאה ביצירת עותק הקריאה")
+            self._stopped.wait(self.refresh_seconds)
@@ -0,0 +1,116 @@
+"""טבלאות סיכום לניתוח התפעולי (לשונית הניתוח בדף הניהול)
+
+location_hourly - לכל יום, שעה ומיקום עבודה: כמה משמרות היו פעילות באותה שעה
+                  וכמה שעות משמרת נעבדו בה, מ-shift_hours (שעון ישראל).
+rahal_weekly    - לכל רח"ל ושבוע (ראשון עד שבת): משמרות שהסתיימו, עובדים וסך
+                  מספר הדיווחים שנמסרו ביציאה, מדיווחי היציאה.
+
+כמו weekly_hours, כל מנת דיווחים מחשבת מחדש רק את הימים והשבועות שהושפעו
+ממנה (refresh), באותה טרנזקציה. רק משמרות שהסתיימו ואינן ארוכות מ-MAX_SHIFT_HOURS
+נספרות בכיסוי - משמרת ארוכה יותר היא כמעט תמיד יציאה שלא דווחה, ומופיעה בחריגות.
+"""
+from datetime import timedelta
+
+import clock
+from queries import MAX_SHIFT_HOURS, REPORTS_ALL, month_of
+
+# השעות המקומיות שבהן הייתה המשמרת פעילה: שורה לכל שעה עגולה, עם החלק ממנה שנעבד
+COVERAGE_SQL = f"""
+SELECT CAST(hour_start AS DATE) AS day,
+       CAST(hour(hour_start) AS INTEGER) AS hour,
+       work_location,
+       COUNT(*) AS shifts,
+       SUM(epoch(least(exit_local, hour_start + INTERVAL 1 HOUR) - greatest(entry_local, hour_start)) / 3600.0)
+           AS staffed_hours
+FROM (
+    SELECT work_location, entry_local, exit_local,
+           unnest(generate_series(date_trunc('hour', entry_local), exit_local, INTERVAL 1 HOUR)) AS hour_start
+    FROM (
+        SELECT work_location,
+               timezone('{clock.TIMEZONE}', entry_timestamp) AS entry_local,
+               timezone('{clock.TIMEZONE}', exit_timestamp) AS exit_local
+        FROM shift_hours
+        WHERE hours_worked > 0 AND hours_worked <= {MAX_SHIFT_HOURS}
+        {{where}}
+    )
+)
+WHERE hour_start < exit_local {{bucket_where}}
+GROUP BY ALL
+"""
+
+RAHAL_SQL = f"""
+SELECT rahal,
+       end_date - CAST(dayofweek(end_date) AS INTEGER) AS week_start,
+       COUNT(*) AS shifts,
+       COUNT(DISTINCT personal_id) AS employees,
+       SUM(reports_count) AS reports_total
+FROM {REPORTS_ALL}
+WHERE report_type = 'exit' AND rahal IS NOT NULL AND end_date IS NOT NULL
+{{where}}
+GROUP BY ALL
+"""
+
+# הטבלאות שבונה rebuild, לאיפוס ולפסילת המטמון
+TABLES = ("location_hourly", "rahal_weekly")
+
+
+def week_start(day):
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+def affected(report):
+    """הימים ו-(רח"ל, שבוע) שדיווח משפיע עליהם: (קבוצת ימים, קבוצת זוגות)
+
+    רק יציאה משנה את הסיכומים - היא סוגרת משמרות שהחלו עד MAX_SHIFT_HOURS לפניה.
+    """
+    if report["report_type"] != "exit" or report["timestamp"] is None:
+        return set(), set()
+    local = report["timestamp"].astimezone(clock.ISRAEL)
+    first = (local - timedelta(hours=MAX_SHIFT_HOURS)).date()
+    days = {first + timedelta(days=offset) for offset in range((local.date() - first).days + 1)}
+    weeks = {(report["rahal"], week_start(local.date()))} if report["rahal"] else set()
+    return days, weeks
+
+
+def refresh(con, days, weeks):
+    """חישוב מחדש של הימים ב-location_hourly וזוגות (רח"ל, שבוע) ב-rahal_weekly"""
+    if days:
+        first, last = min(days), max(days)
+        con.execute("DELETE FROM location_hourly WHERE day IN (SELECT unnest(?::DATE[]))", [sorted(days)])
+        # המשמרות שחופפות לימים: התחילו לכל היותר MAX_SHIFT_HOURS לפני היום הראשון
+        con.execute(f"""
+            INSERT INTO location_hourly
+            {COVERAGE_SQL.format(
+                where="AND entry_timestamp >= ? AND entry_timestamp < ?",
+                bucket_where="AND CAST(hour_start AS DATE) IN (SELECT unnest(?::DATE[]))",
+            )}
+        """, [
+            clock.start_of_day(first) - timedelta(hours=MAX_SHIFT_HOURS),
+            clock.start_of_day(last + timedelta(days=1)),
+            sorted(days),
+        ])
+    if weeks:
+        rahals, starts = zip(*weeks)
+        first, last = clock.start_of_day(min(starts)), clock.start_of_day(max(starts) + timedelta(days=7))
+        con.execute(f"""
+            INSERT OR REPLACE INTO rahal_weekly
+            SELECT * FROM ({RAHAL_SQL.format(where="AND timestamp >= ? AND timestamp < ? AND month >= ? AND month <= ?")})
+            SEMI JOIN (SELECT unnest(?::VARCHAR[]) AS rahal, unnest(?::DATE[]) AS week_start) keys
+            USING (rahal, week_start)
+        """, [first, last, month_of(first), month_of(last), list(rahals), list(starts)])
+
+
+def rebuild(con):
+    """בנייה מחדש של כל טבלאות הסיכום מ-shift_hours ומכל הדיווחים"""
+    con.execute("DELETE FROM location_hourly")
+    con.execute("DELETE FROM rahal_weekly")
+    con.execute(f"""
+        INSERT INTO location_hourly
+        {COVERAGE_SQL.format(where="", bucket_where="")}
+        ORDER BY day, hour, work_location
+    """)
+    con.execute(f"""
+        INSERT INTO rahal_weekly
+        {RAHAL_SQL.format(where="")}
+        ORDER BY week_start, rahal
+    """)
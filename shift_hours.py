@@ -0,0 +1,107 @@
+"""טבלאות השעות המחושבות מראש
+
+shift_hours - שורה לכל משמרת: נפתחת בדיווח כניסה ונסגרת בדיווח היציאה הראשון שאחריו.
+weekly_hours - סיכום לכל עובד ושבוע (ראשון עד שבת), מתעדכן יחד עם shift_hours.
+"""
+from queries import HOURS_WORKED_SQL, REPORTS_ALL, paired_shifts_sql
+
+# תחילת השבוע (יום ראשון) של תאריך תחילת המשמרת
+WEEK_START_SQL = "start_date - CAST(dayofweek(start_date) AS INTEGER)"
+
+WEEKLY_ROLLUP_SQL = """
+SELECT
+    personal_id,
+    week_start,
+    STRING_AGG(DISTINCT work_location, ', ' ORDER BY work_location),
+    COUNT(*),
+    COUNT(hours_worked),
+    SUM(COALESCE(hours_worked, 0)),
+    MIN(start_date),
+    MAX(COALESCE(end_date, start_date))
+FROM shift_hours
+"""
+
+
+def on_report(con, report):
+    """עדכון shift_hours בעקבות דיווח שנשמר ב-reports (באותה טרנזקציה)
+
+    מחזיר את זוגות (personal_id, week_start) שיש לחשב מחדש ב-refresh_weeks.
+    """
+    if report["timestamp"] is None:
+        return set()
+    if report["report_type"] == "entry":
+        week_start = con.execute(f"""
+            INSERT INTO shift_hours (
+                personal_id, work_location, entry_timestamp, start_date, start_time, week_start
+            )
+            SELECT *, {WEEK_START_SQL}
+            FROM (SELECT ? AS personal_id, ? AS work_location, ?::TIMESTAMPTZ AS entry_timestamp,
+                         ?::DATE AS start_date, ?::TIME AS start_time)
+            RETURNING week_start
+        """, (
+            report["personal_id"],
+            report["work_location"],
+            report["timestamp"],
+            report["start_date"],
+            report["start_time"],
+        )).fetchall()
+    else:
+        # היציאה סוגרת את כל המשמרות הפתוחות של העובד שהחלו לפניה
+        week_start = con.execute("""
+            UPDATE shift_hours
+            SET exit_timestamp = ?, end_date = ?, end_time = ?
+            WHERE personal_id = ?
+            AND exit_timestamp IS NULL
+            AND entry_timestamp < ?
+            RETURNING week_start
+        """, (
+            report["timestamp"],
+            report["end_date"],
+            report["end_time"],
+            report["personal_id"],
+            report["timestamp"],
+        )).fetchall()
+        con.execute(f"""
+            UPDATE shift_hours
+            SET hours_worked = {HOURS_WORKED_SQL}
+            WHERE personal_id = ?
+            AND exit_timestamp = ?
+        """, (report["personal_id"], report["timestamp"]))
+
+    return {(report["personal_id"], week) for (week,) in week_start if week is not None}
+
+
+def refresh_weeks(con, keys):
+    """חישוב מחדש של שורות הסיכום השבועי עבור זוגות (personal_id, week_start)"""
+    if not keys:
+        return
+    personal_ids, weeks = zip(*keys)
+    con.execute(f"""
+        INSERT OR REPLACE INTO weekly_hours
+        {WEEKLY_ROLLUP_SQL}
+        SEMI JOIN (SELECT unnest(?::VARCHAR[]) AS personal_id, unnest(?::DATE[]) AS week_start) keys
+        USING (personal_id, week_start)
+        GROUP BY personal_id, week_start
+    """, (list(personal_ids), list(weeks)))
+
+
+def rebuild(con, source=REPORTS_ALL):
+    """בנייה מחדש של shift_hours ו-weekly_hours מכל הדיווחים, כולל הארכיון
+
+    source="reports" - רק מהטבלה עצמה, למיגרציות שרצות לפני שנוצר הארכיון.
+    """
+    con.execute("DELETE FROM weekly_hours")
+    con.execute("DELETE FROM shift_hours")
+    con.execute(f"""
+        INSERT INTO shift_hours
+        SELECT *, {WEEK_START_SQL}
+        FROM ({paired_shifts_sql(source)})
+        ORDER BY entry_timestamp
+    """)
+    con.execute(f"""
+        INSERT INTO weekly_hours
+        {WEEKLY_ROLLUP_SQL}
+        WHERE week_start IS NOT NULL
+        GROUP BY personal_id, week_start
+    """)
+    return con.execute("SELECT COUNT(*) FROM shift_hours").fetchone()[0]
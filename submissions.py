@@ -0,0 +1,191 @@
+"""תור הגשות בכתיבה מוקדמת (write-ahead)
+
+כל הגשה של טופס נכתבת כשורת JSON לקובץ מקטע בתיקיית התור ומסונכרנת לדיסק
+לפני שהטופס מאשר אותה. תהליכון רקע מעביר את ההגשות ל-reports ול-green_eyes
+בטרנזקציות של עד BATCH_SIZE הגשות, ובאותה טרנזקציה שומר ב-submission_queue_state
+עד איזה מקום בתור הכול כבר נשמר - כך שאחרי קריסה ההגשות שנותרו מוחלות בדיוק פעם אחת.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, time
+
+import duckdb
+
+import db
+
+QUEUE_DIR = "submissions"
+FLUSH_INTERVAL = 0.5
+BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+# פונקציית השמירה לכל טבלה - מקבלת רשימת שורות לפי סדר ההגשה
+_APPLY = {
+    "reports": db.insert_reports,
+    "green_eyes": db.upsert_locations,
+}
+
+# המרת שדות התאריך והשעה בחזרה מ-JSON
+_FIELD_TYPES = {
+    "timestamp": datetime.fromisoformat,
+    "start_date": date.fromisoformat,
+    "start_time": time.fromisoformat,
+    "end_date": date.fromisoformat,
+    "end_time": time.fromisoformat,
+}
+
+
+def _encode(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"לא ניתן לשמור בתור ערך מסוג {type(value).__name__}")
+
+
+def _decode(row):
+    return {
+        field: _FIELD_TYPES[field](value) if value is not None and field in _FIELD_TYPES else value
+        for field, value in row.items()
+    }
+
+
+class SubmissionQueue:
+    """תור ההגשות של התהליך; submit בטוח לקריאה מכמה תהליכונים במקביל"""
+
+    def __init__(self, database, directory=QUEUE_DIR, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE,
+                 on_write=None):
+        # database הוא db.ConnectionManager - לתהליכון הכתיבה סמן משלו ממנו
+        self._database = database
+        # on_write(tables) נקרא אחרי כל מנה שנשמרה, עם שמות הטבלאות שהשתנו
+        self._on_write = on_write
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._append_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        os.makedirs(directory, exist_ok=True)
+        applied_segment, _ = self._state()
+        self._segment = max(self._segments() + [applied_segment]) + 1
+        self._file = open(self._path(self._segment), "ab")
+
+        # הגשות שנותרו בתור מהרצה קודמת נשמרות לפני שהאפליקציה מתחילה לקרוא
+        self.flush()
+        self._thread = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, table, row):
+        """הוספת הגשה לתור; חוזר רק אחרי שהיא נכתבה לדיסק"""
+        if table not in _APPLY:
+            raise ValueError(f"טבלה לא מוכרת: {table}")
+        line = json.dumps({"table": table, "row": row}, default=_encode, ensure_ascii=False)
+        with self._append_lock:
+            self._file.write(line.encode("utf-8") + b"\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def flush(self):
+        """שמירת כל ההגשות שבתור במסד הנתונים"""
+        with self._flush_lock:
+            with self._append_lock:
+                # מעבר למקטע חדש, כך שהמקטעים שנקראים כאן כבר לא משתנים
+                if self._file.tell() > 0:
+                    self._file.close()
+                    self._segment += 1
+                    self._file = open(self._path(self._segment), "ab")
+                current = self._segment
+
+            applied_segment, position = self._state()
+            for segment in self._segments():
+                if segment >= current:
+                    break
+                if segment >= applied_segment:
+                    self._apply_segment(segment, position if segment == applied_segment else 0)
+                os.remove(self._path(segment))
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def _run(self):
+        while not self._stopped.wait(self._flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # ההגשות נשארות בתור וינוסו שוב בסבב הבא
+                logger.exception("שגיאה בשמירת הגשות מהתור")
+
+    def _apply_segment(self, segment, start):
+        with open(self._path(segment), "rb") as segment_file:
+            segment_file.seek(start)
+            batch = []
+            position = start
+            for line in segment_file:
+                # שורה ללא סיום נקטעה בכתיבה ולכן מעולם לא אושרה למשתמש
+                if not line.endswith(b"\n"):
+                    break
+                position += len(line)
+                batch.append((json.loads(line), position))
+                if len(batch) >= self._batch_size:
+                    self._apply_batch(segment, batch)
+                    batch = []
+            if batch:
+                self._apply_batch(segment, batch)
+
+    def _apply_batch(self, segment, batch):
+        """שמירת מנה בטרנזקציה אחת; batch היא רשימת (הגשה, המיקום בקובץ שאחריה)"""
+        def apply_all(con):
+            for table, apply in _APPLY.items():
+                apply(con, [_decode(record["row"]) for record, _ in batch if record["table"] == table])
+            self._set_state(con, segment, batch[-1][1])
+
+        def apply_one(con, record, position):
+            _APPLY[record["table"]](con, [_decode(record["row"])])
+            self._set_state(con, segment, position)
+
+        try:
+            self._database.write(apply_all, label="submissions_batch", rows=len(batch))
+        except Exception:
+            # הגשה פגומה אחת לא תעכב את כל המנה - שמירה אחת-אחת ודחיית הפגומות
+            for record, position in batch:
+                try:
+                    self._database.write(apply_one, record, position, label="submissions_one", rows=1)
+                except duckdb.TransactionException:
+                    # התנגשות שנמשכה גם אחרי הניסיונות החוזרים - ההגשה תנוסה שוב בסבב הבא
+                    raise
+                except Exception as e:
+                    self._reject(record, e)
+                    self._database.write(self._set_state, segment, position, label="queue_state")
+        finally:
+            # גם כשרק חלק מהמנה נשמר - עדיף לפסול תוצאות במטמון מאשר להשאירן ישנות
+            self._written({record["table"] for record, _ in batch})
+
+    def _written(self, tables):
+        if self._on_write is not None:
+            self._on_write(tables)
+
+    def _reject(self, record, error):
+        logger.error("הגשה נדחתה: %s (%s)", record, error)
+        with open(os.path.join(self._directory, "rejected.jsonl"), "a", encoding="utf-8") as rejected:
+            rejected.write(json.dumps({"error": str(error), **record}, ensure_ascii=False) + "\n")
+
+    def _state(self):
+        return self._database.read("SELECT segment, position FROM submission_queue_state", label="queue_state")[0]
+
+    @staticmethod
+    def _set_state(con, segment, position):
+        con.execute("UPDATE submission_queue_state SET segment = ?, position = ?", (segment, position))
+
+    def _segments(self):
+        return sorted(
+            int(name.split(".")[0])
+            for name in os.listdir(self._directory)
+            if name.endswith(".log")
+        )
+
+    def _path(self, segment):
+        return os.path.join(self._directory, f"{segment:012d}.log")
@@ -0,0 +1,67 @@
+"""המצב המוצג במעקב היכן אני כעת - מ.א -> (מיקום נוכחי, במשמרת, זמן העדכון)
+
+נטען פעם אחת מ-green_eyes, ומשם מתעדכן רק מהעדכונים שנוספו ל-green_eyes_history
+אחרי ה-event_id האחרון שנקרא. כך כל רענון של המעקב קורא רק את השינויים, ולא
+את כל green_eyes מחדש.
+
+את עדכוני המיקום שומר רק תהליכון הכתיבה של התור, מנה אחר מנה, ולכן event_id
+עולה לפי סדר השמירה ועדכון שנשמר לא יופיע מתחת ל-event_id שכבר נקרא. שינוי
+שאינו עדכון חדש (איפוס היכן אני כעת) מתגלה לפי מספר השורות ב-green_eyes, ואז
+המצב נטען מחדש.
+"""
+from queries import TRACKING_STATE_QUERY, TRACKING_CHANGES_QUERY
+
+
+class LiveTracking:
+    """המצב של סשן אחד (נשמר ב-st.session_state)"""
+
+    def __init__(self):
+        self._locations = {}
+        self.last_event = None
+        # עולה בכל שינוי במצב, כדי שהתצוגה תיבנה מחדש רק כשצריך
+        self.version = 0
+
+    def reload(self, query_cache):
+        """טעינת המצב כולו מ-green_eyes"""
+        rows = query_cache.read(TRACKING_STATE_QUERY, tables=("green_eyes",), label="tracking")
+        self._locations = {
+            personal_id: (current_location, on_shift, timestamp)
+            for personal_id, current_location, on_shift, timestamp, _ in rows
+        }
+        self.last_event = rows[0][4] if rows else 0
+        self.version += 1
+
+    def refresh(self, query_cache):
+        """מיזוג העדכונים שנוספו מאז הקריאה הקודמת; מחזיר את מספר העובדים שהשתנו"""
+        if self.last_event is None:
+            self.reload(query_cache)
+            return len(self._locations)
+
+        total, changes = query_cache.read(
+            TRACKING_CHANGES_QUERY, [self.last_event], tables=("green_eyes",), label="tracking_changes"
+        )[0]
+        for change in changes or ():
+            current = self._locations.get(change["personal_id"])
+            # כמו ב-green_eyes: העדכון השמור האחרון, אלא אם נטען מקובץ עדכון ישן יותר
+            if current is None or change["timestamp"] >= current[2]:
+                self._locations[change["personal_id"]] = (
+                    change["current_location"], change["on_shift"], change["timestamp"]
+                )
+            self.last_event = max(self.last_event, change["event_id"])
+        if changes:
+            self.version += 1
+
+        if len(self._locations) != total:
+            self.reload(query_cache)
+        return len(changes or ())
+
+    def rows(self):
+        """(מ.א, מיקום נוכחי, במשמרת, זמן העדכון) לכל עובד, מהעדכון האחרון לראשון"""
+        return sorted(
+            ((personal_id, *location) for personal_id, location in self._locations.items()),
+            key=lambda row: row[3],
+            reverse=True,
+        )
+
+    def __len__(self):
+        return len(self._locations)
@@ -0,0 +1,4 @@
+"""דפי האפליקציה - כל דף נטען רק כשעוברים אליו
+
+דפי העובדים (דוח משמרת, היכן אני כעת) אינם טוענים את pandas; רק דף הניהול טוען.
+"""
@@ -0,0 +1,762 @@
+"""דף הניהול - סיכומי שעות, מעקב היכן אני כעת, כל הדיווחים, ניתוח תפעולי, ניהול נתונים וביצועים"""
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import archive
+import clock
+import db
+import export
+import maintenance
+import metrics
+import tracking
+from queries import (
+    WEEKLY_HOURS_QUERY, NOT_REPORTED_QUERY, TRACKING_AS_OF_QUERY, NOT_REPORTED_AS_OF_QUERY,
+    ROSTER_SIZE_QUERY, FILTER_VALUES_QUERY, LOCATION_LOAD_QUERY, RAHAL_WEEKLY_QUERY, MAX_SHIFT_HOURS, hours_by_period_query,
+    shift_anomalies_query, PAGE_SIZE, REPORT_TYPE_LABELS,
+    ALL_REPORTS_LABELS, all_reports_page_query, all_reports_summary_query,
+)
+
+# כל כמה שניות מתרענן המעקב החי
+TRACKING_REFRESH_SECONDS = 5
+
+
+# פונקציה לחישוב תאריכי השבוע
+def get_week_dates(target_date):
+    """חישוב תאריכי השבוע (ראשון עד ראשון) בהתבסס על תאריך נתון"""
+    days_since_sunday = (target_date.weekday() + 1) % 7
+    week_start = target_date - timedelta(days=days_since_sunday)
+    week_end = week_start + timedelta(days=6)
+    return week_start, week_end
+
+
+# הצגת חריגות בדיווחי המשמרות בין שני תאריכים (כולל)
+def show_anomalies(query_cache, first_day, last_day):
+    anomalies = query_cache.read(*shift_anomalies_query(
+        clock.start_of_day(first_day), clock.start_of_day(last_day + timedelta(days=1))
+    ), tables=("reports",), label="shift_anomalies")
+    with st.expander(f"⚠️ חריגות בדיווחים ({len(anomalies)})"):
+        st.caption(f"משמרת ארוכה מ-{MAX_SHIFT_HOURS} שעות נחשבת חריגה")
+        if anomalies:
+            st.dataframe(
+                pd.DataFrame(anomalies, columns=['מ.א', 'סוג חריגה', 'זמן דיווח', 'שעות']),
+                use_container_width=True,
+                hide_index=True
+            )
+
+
+# שמות הימים לפי weekday של LOCATION_LOAD_QUERY (1 = ראשון)
+WEEKDAY_LABELS = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
+
+
+# מפת חום: ממוצע העובדים במשמרת לפי שעה (עמודות) ו-y (שורות)
+def show_heatmap(df, y, y_order):
+    import altair as alt
+    
+    st.altair_chart(
+        alt.Chart(df).mark_rect().encode(
+            x=alt.X('שעה:O'),
+            y=alt.Y(f'{y}:N', sort=y_order, title=None),
+            color=alt.Color('עובדים במשמרת:Q', scale=alt.Scale(scheme='blues')),
+            tooltip=[y, 'שעה', 'עובדים במשמרת', 'שיא משמרות'],
+        ),
+        use_container_width=True
+    )
+
+
+# עמודות טבלת המעקב, במצב הנוכחי ובזמן עבר
+TRACKING_COLUMNS = ['מ.א', 'מיקום נוכחי', 'האם במשמרת', 'תאריך ושעת עדכון']
+
+
+# הצגת המעקב: סיכום, מי שלא דיווח ומיקום כל עובד
+def show_tracking(query_cache, df_reports, missing):
+    # הצגת סיכום - כל עובד מופיע פעם אחת בתוצאות
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("דיווחו על מיקום", len(df_reports))
+    with col2:
+        st.metric("לא דיווחו", len(missing))
+    
+    # רשימת מי שלא דיווח, מרשימת העובדים
+    if missing:
+        with st.expander(f"🚫 לא דיווחו ({len(missing)})"):
+            st.dataframe(
+                pd.DataFrame(missing, columns=['מ.א', 'שם', 'רח"ל']),
+                use_container_width=True,
+                hide_index=True
+            )
+    elif not query_cache.read(ROSTER_SIZE_QUERY, tables=("roster",), label="roster_size")[0][0]:
+        st.info("רשימת העובדים ריקה - ניתן לטעון אותה בדף ניהול נתונים")
+    
+    # טבלת הדיווחים
+    if len(df_reports):
+        st.subheader("📊 כל הדיווחים")
+        st.dataframe(df_reports, use_container_width=True, hide_index=True)
+
+
+# המצב הנוכחי מתרענן לבד, וכל רענון קורא רק את עדכוני המיקום שנוספו מאז הקודם
+@st.fragment(run_every=TRACKING_REFRESH_SECONDS)
+def show_live_tracking(database, query_cache):
+    with database.metrics.timed("fragment", "live_tracking"):
+        try:
+            live = st.session_state.get('live_tracking')
+            if live is None:
+                live = st.session_state.live_tracking = tracking.LiveTracking()
+            live.refresh(query_cache)
+            
+            # הטבלה נבנית מחדש רק כשהמצב השתנה
+            if st.session_state.get('live_tracking_version') != live.version:
+                st.session_state.live_tracking_df = pd.DataFrame([
+                    (personal_id, current_location, on_shift,
+                     timestamp.astimezone(clock.ISRAEL).strftime('%d/%m/%Y %H:%M'))
+                    for personal_id, current_location, on_shift, timestamp in live.rows()
+                ], columns=TRACKING_COLUMNS)
+                st.session_state.live_tracking_version = live.version
+            
+            missing = query_cache.read(NOT_REPORTED_QUERY, tables=("green_eyes", "roster"), label="not_reported")
+            show_tracking(query_cache, st.session_state.live_tracking_df, missing)
+            st.caption(f"🔄 מתעדכן כל {TRACKING_REFRESH_SECONDS} שניות · עודכן ב-{clock.now():%H:%M:%S}")
+        except Exception as e:
+            st.error(f"שגיאה בטעינת נתוני היכן אני כעת: {str(e)}")
+
+
+# יצירת קובץ ייצוא של הדיווחים - נקרא רק בלחיצה על כפתור ההורדה; התוכן שמוחזר
+# הוא הקובץ כולו, ונשמר בזיכרון השרת להורדה (ראו export.py)
+def build_export(database, filters, export_format):
+    fd, path = tempfile.mkstemp(suffix="." + export.EXPORT_FORMATS[export_format][1])
+    os.close(fd)
+    try:
+        export.export_reports(database, filters, export_format, path)
+        with open(path, "rb") as export_file:
+            return export_file.read()
+    finally:
+        os.remove(path)
+
+
+def show_replica_status(replica):
+    if not replica.enabled:
+        st.caption("🟢 נתונים חיים")
+        return
+    staleness = replica.staleness()
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        if staleness is None:
+            st.caption("⏳ עותק הקריאה עדיין בהכנה - הנתונים נקראים ישירות")
+        else:
+            created_at, behind = staleness
+            created = datetime.fromtimestamp(created_at, clock.ISRAEL).strftime('%H:%M:%S')
+            status = "מעודכן" if not behind else f"ללא השינויים של {behind:.0f} השניות האחרונות"
+            st.caption(f"🕒 נתוני הניהול נכונים ל-{created} ({status}; רענון כל {replica.refresh_seconds} שניות)")
+    with col2:
+        if st.button("🔄 רענון עכשיו"):
+            with st.spinner("מרענן את הנתונים..."):
+                replica.refresh()
+            st.rerun()
+
+
+def refresh_replica(replica):
+    # אחרי פעולת ניהול התוצאה צריכה להופיע מיד, בלי לחכות לרענון הבא
+    replica.changed()
+    with st.spinner("מעדכן את נתוני הניהול..."):
+        replica.refresh()
+
+
+def render(database, live_cache, replica, queue, shifts, password):
+    st.title("⏰ דף ניהול")
+    st.markdown("---")
+    
+    # בדיקת קוד גישה
+    if 'access_granted' not in st.session_state:
+        st.session_state.access_granted = False
+    
+    if not st.session_state.access_granted:
+        st.subheader("🔐 הכנס קוד גישה")
+        access_code = st.text_input("קוד גישה:", type="password")
+        
+        if st.button("אמת קוד"):
+            if access_code == password:
+                st.session_state.access_granted = True
+                st.rerun()
+            else:
+                st.error("❌ קוד שגוי!")
+        st.stop()
+    
+    # הקריאות של דף הניהול רצות על עותק הקריאה, חוץ מהמעקב החי שקורא מהקובץ הראשי
+    query_cache = replica.cache
+    show_replica_status(replica)
+    
+    # תפריט בדף ניהול
+    admin_tab = st.selectbox("בחר סוג דיווח:", [
+        "סיכום שעות עבודה", 
+        "היכן אני כעת - מעקב",
+        "כל הדיווחים - משמרות", 
+        "ניתוח תפעולי",
+        "ניהול נתונים",
+        "ביצועים"
+    ])
+    
+    if admin_tab == "סיכום שעות עבודה":
+        # הצגת דיווח שעות עם בחירת שבוע
+        st.subheader("📊 סיכום שעות עבודה")
+        
+        hours_mode = st.radio("תצוגה:", ["week", "range"], horizontal=True,
+                              format_func=lambda x: "שבוע" if x == "week" else "טווח תאריכים")
+        
+        if hours_mode == "week":
+            # בחירת שבוע
+            col1, col2 = st.columns([2, 1])
+        
+            with col1:
+                # בחירת תאריך לחישוב השבוע
+                selected_date = st.date_input(
+                    "בחר תאריך לחישוב השבוע:",
+                    value=clock.today(),
+                    help="השבוע יחושב מהראשון עד הראשון הקרוב"
+                )
+        
+            with col2:
+                # כפתור לחזרה לשבוע הנוכחי
+                if st.button("🔄 שבוע נוכחי"):
+                    selected_date = clock.today()
+                    st.rerun()
+        
+            try:
+                # חישוב תאריכי השבוע על בסיס התאריך שנבחר
+                week_start, week_end = get_week_dates(selected_date)
+            
+                st.info(f"השבוע הנבחר: {week_start.strftime('%d/%m/%Y')} - {week_end.strftime('%d/%m/%Y')}")
+            
+                # קריאת הסיכום השבועי המחושב מראש
+                results = query_cache.read(
+                    WEEKLY_HOURS_QUERY, [week_start], tables=("weekly_hours",), label="weekly_hours"
+                )
+            
+                if results:
+                    # יצירת DataFrame להצגה
+                    df = pd.DataFrame(results, columns=[
+                        'מ.א','מיקום עבודה' , 'סה״כ משמרות', 'משמרות שהושלמו', 
+                        'סה״כ שעות', 'ממוצע שעות למשמרת', 'תאריך ראשון', 'תאריך אחרון'
+                    ])
+                
+                    # הצגת סיכום כללי
+                    total_hours_all = df['סה״כ שעות'].sum()
+                    total_shifts_all = df['סה״כ משמרות'].sum()
+                    active_employees = len(df)
+                
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("סה״כ שעות השבוע", f"{total_hours_all:.1f}")
+                    with col2:
+                        st.metric("סה״כ משמרות", total_shifts_all)
+                    with col3:
+                        st.metric("עובדים פעילים", active_employees)
+                
+                    # הצגת הטבלה
+                    st.dataframe(
+                        df,
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                
+                    # גרף שעות עבודה
+                    if len(df) > 0:
+                        st.subheader("📈 גרף שעות עבודה")
+                        chart_data = df.set_index('מ.א')['סה״כ שעות']
+                        st.bar_chart(chart_data)
+                else:
+                    st.info(f"אין נתונים לשבוע {week_start.strftime('%d/%m/%Y')} - {week_end.strftime('%d/%m/%Y')}")
+                
+                show_anomalies(query_cache, week_start, week_end)
+                
+            except Exception as e:
+                st.error(f"שגיאה בטעינת נתוני השעות: {str(e)}")
+    
+        
+        else:
+            # טווח תאריכים חופשי, מקובץ לפי שבועות או חודשים
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                hours_range = st.date_input(
+                    "טווח תאריכים:",
+                    value=(clock.today().replace(day=1), clock.today()),
+                    format="DD/MM/YYYY"
+                )
+            with col2:
+                period = st.radio("קיבוץ לפי:", ["week", "month"], horizontal=True,
+                                  format_func=lambda x: "שבוע" if x == "week" else "חודש")
+            
+            if len(hours_range) < 2:
+                st.info("בחר תאריך התחלה ותאריך סיום")
+            else:
+                try:
+                    range_start, range_end = hours_range
+                    results = query_cache.read(
+                        hours_by_period_query(period), [range_start, range_end], tables=("shift_hours",),
+                        label=f"hours_by_{period}"
+                    )
+                    
+                    if results:
+                        df = pd.DataFrame(results, columns=[
+                            'מ.א', 'תקופה', 'סה״כ משמרות', 'משמרות שהושלמו', 'סה״כ שעות'
+                        ])
+                        period_format = '%d/%m/%Y' if period == "week" else '%m/%Y'
+                        df['תקופה'] = pd.to_datetime(df['תקופה']).dt.strftime(period_format)
+                        
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric("סה״כ שעות בטווח", f"{df['סה״כ שעות'].sum():.1f}")
+                        with col2:
+                            st.metric("סה״כ משמרות", df['סה״כ משמרות'].sum())
+                        with col3:
+                            st.metric("עובדים פעילים", df['מ.א'].nunique())
+                        
+                        # טבלת עובד x תקופה, עם עמודת סה״כ
+                        periods = list(dict.fromkeys(df['תקופה']))
+                        pivot = df.pivot(index='מ.א', columns='תקופה', values='סה״כ שעות').reindex(columns=periods).fillna(0)
+                        pivot['סה״כ'] = pivot.sum(axis=1)
+                        pivot = pivot.sort_values('סה״כ', ascending=False)
+                        st.dataframe(pivot, use_container_width=True)
+                        
+                        # גרף שעות מוערם לפי תקופות
+                        st.subheader("📈 גרף שעות עבודה")
+                        st.bar_chart(pivot.drop(columns='סה״כ'), stack=True)
+                        
+                        with st.expander("פירוט לפי עובד ותקופה"):
+                            st.dataframe(df, use_container_width=True, hide_index=True)
+                    else:
+                        st.info("אין נתונים בטווח התאריכים הנבחר")
+                    
+                    show_anomalies(query_cache, range_start, range_end)
+                
+                except Exception as e:
+                    st.error(f"שגיאה בטעינת נתוני השעות: {str(e)}")
+    
+    elif admin_tab == "היכן אני כעת - מעקב":
+        st.subheader("👀 מעקב היכן אני כעת")
+    
+        try:
+            # מצב נוכחי מ-green_eyes, או מצב בזמן עבר מההיסטוריה
+            as_of = None
+            if st.checkbox("הצג מצב בזמן עבר"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    as_of_date = st.date_input("תאריך:", value=clock.today() - timedelta(days=1), format="DD/MM/YYYY")
+                with col2:
+                    as_of_time = st.time_input("שעה:", value=time(14, 0))
+                as_of = datetime.combine(as_of_date, as_of_time, clock.ISRAEL)
+            
+            if as_of is None:
+                show_live_tracking(database, live_cache)
+            else:
+                all_reports = query_cache.read(
+                    TRACKING_AS_OF_QUERY, [as_of], tables=("green_eyes_history",), label="tracking_as_of"
+                )
+                missing = query_cache.read(
+                    NOT_REPORTED_AS_OF_QUERY, [as_of], tables=("green_eyes_history", "roster"), label="not_reported_as_of"
+                )
+                show_tracking(query_cache, pd.DataFrame(all_reports, columns=TRACKING_COLUMNS), missing)
+            
+        except Exception as e:
+            st.error(f"שגיאה בטעינת נתוני היכן אני כעת: {str(e)}")
+    
+    elif admin_tab == "כל הדיווחים - משמרות":
+        st.subheader("📋 כל הדיווחים - כניסה ויציאה ממשמרת")
+        
+        try:
+            # מסננים - מועברים לשאילתה ולא מסוננים אחרי טעינה
+            rahal_values, location_values = query_cache.read(FILTER_VALUES_QUERY, tables=("reports",), label="filter_values")[0]
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                report_filter = st.selectbox(
+                    "סנן לפי סוג דיווח:",
+                    [None, "entry", "exit"],
+                    format_func=lambda x: "הכל" if x is None else REPORT_TYPE_LABELS[x]
+                )
+            with col2:
+                rahal_filter = st.selectbox("""רח"ל:""", [None] + (rahal_values or []), format_func=lambda x: "הכל" if x is None else x)
+            with col3:
+                location_filter = st.selectbox("מיקום עבודה:", [None] + (location_values or []), format_func=lambda x: "הכל" if x is None else x)
+            
+            col4, col5 = st.columns(2)
+            with col4:
+                date_range = st.date_input("טווח תאריכים:", value=(), format="DD/MM/YYYY")
+            with col5:
+                personal_id_filter = st.text_input("מ.א:", max_chars=4).strip()
+            
+            filters = {
+                "report_type": report_filter,
+                "rahal": rahal_filter,
+                "work_location": location_filter,
+                "personal_id": personal_id_filter or None,
+                "date_from": None,
+                "date_to": None,
+            }
+            if len(date_range) > 0:
+                filters["date_from"] = clock.start_of_day(date_range[0])
+                filters["date_to"] = clock.start_of_day(date_range[-1] + timedelta(days=1))
+            
+            # הצגת סיכום - שאילתת ספירה אחת
+            total_reports, entry_reports, exit_reports = query_cache.read(
+                *all_reports_summary_query(filters), tables=("reports",), label="all_reports_summary"
+            )[0]
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("סה״כ דיווחים", total_reports)
+            with col2:
+                st.metric("דיווחי כניסה", entry_reports)
+            with col3:
+                st.metric("דיווחי יציאה", exit_reports)
+            
+            # עימוד לפי מפתח: רשימת מפתחות תחילת העמודים שכבר נצפו, מתאפסת כשהמסננים משתנים
+            if st.session_state.get('reports_page_filters') != filters:
+                st.session_state.reports_page_filters = filters
+                st.session_state.reports_page_starts = [None]
+            page_starts = st.session_state.reports_page_starts
+            
+            page_rows = query_cache.read(
+                *all_reports_page_query(filters, after=page_starts[-1], limit=PAGE_SIZE + 1), tables=("reports",),
+                label="all_reports_page"
+            )
+            has_next = len(page_rows) > PAGE_SIZE
+            page_rows = page_rows[:PAGE_SIZE]
+            
+            if page_rows:
+                # יצירת DataFrame לעמוד הנוכחי בלבד
+                df_page = pd.DataFrame([row[:-2] for row in page_rows], columns=ALL_REPORTS_LABELS)
+                
+                # הצגת הטבלה
+                st.dataframe(
+                    df_page,
+                    use_container_width=True,
+                    hide_index=True
+                )
+                
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col1:
+                    if st.button("הקודם", disabled=len(page_starts) == 1):
+                        page_starts.pop()
+                        st.rerun()
+                with col2:
+                    st.caption(f"עמוד {len(page_starts)}")
+                with col3:
+                    if st.button("הבא", disabled=not has_next):
+                        page_starts.append(tuple(page_rows[-1][-2:]))
+                        st.rerun()
+                
+                # ייצוא כל הדיווחים העונים למסננים - הקובץ נוצר רק בלחיצה על ההורדה
+                export_format = st.radio(
+                    "פורמט ייצוא:",
+                    list(export.EXPORT_FORMATS),
+                    format_func=lambda x: "CSV (Excel)" if x == "csv" else "Parquet",
+                    horizontal=True
+                )
+                mime, extension = export.EXPORT_FORMATS[export_format]
+                st.download_button(
+                    label="💾 הורד את כל הדיווחים המסוננים",
+                    data=lambda: build_export(replica, filters, export_format),
+                    file_name=f"shift_reports_{clock.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                    mime=mime,
+                    on_click="ignore"
+                )
+                
+            else:
+                st.info("אין דיווחים במערכת")
+                
+        except Exception as e:
+            st.error(f"שגיאה בטעינת דיווחי המשמרות: {str(e)}")
+    
+    elif admin_tab == "ניתוח תפעולי":
+        st.subheader("📈 ניתוח תפעולי")
+        st.caption(f"מטבלאות סיכום שמתעדכנות עם כל דיווח; נספרות רק משמרות שהסתיימו ואינן ארוכות מ-{MAX_SHIFT_HOURS} שעות")
+        
+        date_range = st.date_input(
+            "טווח תאריכים:",
+            value=(clock.today() - timedelta(weeks=8), clock.today()),
+            format="DD/MM/YYYY"
+        )
+        
+        # בזמן הבחירה בלוח מתקבל תאריך אחד בלבד
+        if len(date_range) == 2:
+            range_start, range_end = date_range
+            try:
+                # כיסוי לפי מיקום ושעה ביום
+                st.subheader("🗺️ עובדים במשמרת לפי שעה")
+                load = query_cache.read(
+                    LOCATION_LOAD_QUERY, [range_start, range_end], tables=("location_hourly",), label="location_load"
+                )
+                if load:
+                    df_load = pd.DataFrame(load, columns=['מיקום', 'weekday', 'שעה', 'שעות משמרת', 'שיא משמרות'])
+                    df_load['יום'] = df_load['weekday'].map(lambda day: WEEKDAY_LABELS[day - 1])
+                    
+                    # ממוצע העובדים במשמרת בשעה: שעות המשמרת בה חלקי מספר הימים בטווח
+                    days = [range_start + timedelta(days=offset) for offset in range((range_end - range_start).days + 1)]
+                    by_hour = df_load.groupby(['מיקום', 'שעה'], as_index=False).agg(
+                        {'שעות משמרת': 'sum', 'שיא משמרות': 'max'}
+                    )
+                    by_hour['עובדים במשמרת'] = (by_hour['שעות משמרת'] / len(days)).round(2)
+                    show_heatmap(by_hour, 'מיקום', sorted(by_hour['מיקום'].dropna().unique()))
+                    
+                    # לפי יום בשבוע, למיקום אחד - כל יום בשבוע מחולק במספר הפעמים שהופיע בטווח
+                    location = st.selectbox("מיקום:", sorted(df_load['מיקום'].dropna().unique()))
+                    weekday_counts = pd.Series([day.strftime('%w') for day in days]).astype(int).add(1).value_counts()
+                    by_weekday = df_load[df_load['מיקום'] == location].copy()
+                    by_weekday['עובדים במשמרת'] = (
+                        by_weekday['שעות משמרת'] / by_weekday['weekday'].map(weekday_counts)
+                    ).round(2)
+                    show_heatmap(by_weekday, 'יום', WEEKDAY_LABELS)
+                else:
+                    st.info("אין משמרות שהסתיימו בטווח שנבחר")
+                
+                # מספר הדיווחים למשמרת לפי רח"ל
+                st.subheader('📋 דיווחים למשמרת לפי רח"ל')
+                rahal_weeks = query_cache.read(
+                    RAHAL_WEEKLY_QUERY, [get_week_dates(range_start)[0], range_end], tables=("rahal_weekly",),
+                    label="rahal_weekly"
+                )
+                if rahal_weeks:
+                    df_rahal = pd.DataFrame(rahal_weeks, columns=[
+                        'רח"ל', 'שבוע', 'משמרות', 'עובדים', 'דיווחים', 'ממוצע דיווחים למשמרת'
+                    ])
+                    totals = df_rahal.groupby('רח"ל', as_index=False)[['משמרות', 'דיווחים']].sum()
+                    totals['ממוצע דיווחים למשמרת'] = (totals['דיווחים'] / totals['משמרות']).round(2)
+                    st.dataframe(
+                        totals.sort_values('ממוצע דיווחים למשמרת', ascending=False),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    st.line_chart(df_rahal.pivot(index='שבוע', columns='רח"ל', values='ממוצע דיווחים למשמרת'))
+                else:
+                    st.info("אין משמרות שהסתיימו בטווח שנבחר")
+            
+            except Exception as e:
+                st.error(f"שגיאה בטעינת הניתוח התפעולי: {str(e)}")
+    
+    elif admin_tab == "ניהול נתונים":
+        st.subheader("🗂️ ניהול נתונים")
+        
+        st.warning("⚠️ פעולות אלו יימחקו נתונים לצמיתות!")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("🗑️ איפוס נתוני היכן אני כעת", type="secondary"):
+                if st.session_state.get('confirm_green_eyes_reset', False):
+                    try:
+                        queue.flush()
+                        database.write(db.reset_green_eyes)
+                        live_cache.invalidate("green_eyes")
+                        refresh_replica(replica)
+                        st.success("✅ נתוני היכן אני כעת נמחקו בהצלחה!")
+                        st.session_state.confirm_green_eyes_reset = False
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ שגיאה במחיקת הנתונים: {str(e)}")
+                else:
+                    st.session_state.confirm_green_eyes_reset = True
+                    st.warning("לחץ שוב לאישור המחיקה")
+        
+        with col2:
+            if st.button("🗑️ איפוס נתוני דיווחי משמרות", type="secondary"):
+                if st.session_state.get('confirm_reports_reset', False):
+                    try:
+                        queue.flush()
+                        database.write(db.reset_reports)
+                        live_cache.invalidate("reports")
+                        refresh_replica(replica)
+                        archive.remove_orphans(archive.archive_dir(database.path), [])
+                        shifts.reload(database)
+                        st.success("✅ נתוני דיווחי המשמרות נמחקו בהצלחה!")
+                        st.session_state.confirm_reports_reset = False
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ שגיאה במחיקת הנתונים: {str(e)}")
+                else:
+                    st.session_state.confirm_reports_reset = True
+                    st.warning("לחץ שוב לאישור המחיקה")
+        
+        # איפוס סטטוס האישורים
+        if st.button("❌ ביטול", type="primary"):
+            st.session_state.confirm_green_eyes_reset = False
+            st.session_state.confirm_reports_reset = False
+            st.rerun()
+        
+        # טעינת רשימת העובדים מקובץ CSV - מחליפה את הרשימה הקיימת
+        st.subheader("👥 רשימת עובדים")
+        st.caption(f"עובדים ברשימה: {query_cache.read(ROSTER_SIZE_QUERY, tables=('roster',), label='roster_size')[0][0]}")
+        roster_file = st.file_uploader(
+            "קובץ CSV עם העמודות personal_id, name, rahal, locations (מיקומים מופרדים ב-;)",
+            type="csv"
+        )
+        if roster_file is not None and st.button("📥 טען רשימת עובדים"):
+            fd, roster_path = tempfile.mkstemp(suffix=".csv")
+            try:
+                with os.fdopen(fd, "wb") as roster_csv:
+                    roster_csv.write(roster_file.getvalue())
+                count = database.write(db.import_roster, roster_path)
+                live_cache.invalidate("roster")
+                refresh_replica(replica)
+                st.success(f"✅ נטענו {count} עובדים")
+            except Exception as e:
+                st.error(f"❌ שגיאה בטעינת רשימת העובדים: {str(e)}")
+            finally:
+                os.remove(roster_path)
+        
+        # העברת חודשים סגורים לארכיון - הדיווחים נשארים זמינים בכל הלשוניות
+        st.subheader("📦 ארכיון דיווחים")
+        # מצב הארכיון מוצג כאן אך נקרא רק אחרי הטיפול בכפתור, כדי לכלול את ההעברה
+        archive_status = st.container()
+        keep_months = st.number_input(
+            "חודשים אחרונים שנשארים בטבלה (כולל החודש הנוכחי):",
+            min_value=1, max_value=36, value=archive.KEEP_MONTHS
+        )
+        archive_cutoff = archive.cutoff(clock.today(), keep_months)
+        if st.button(f"📦 העבר לארכיון את הדיווחים שלפני {archive_cutoff.strftime('%d/%m/%Y')}"):
+            try:
+                queue.flush()
+                directory = archive.archive_dir(database.path)
+                archived = database.write(archive.archive_reports, directory, archive_cutoff)
+                live_cache.invalidate("reports")
+                archive.remove_orphans(
+                    directory, [path for (path,) in database.read("SELECT path FROM report_archive")]
+                )
+                refresh_replica(replica)
+                if archived:
+                    st.success(f"✅ הועברו לארכיון {sum(rows for _, rows in archived)} דיווחים מ-{len(archived)} חודשים")
+                else:
+                    st.info("אין חודשים סגורים להעברה לארכיון")
+            except Exception as e:
+                st.error(f"❌ שגיאה בהעברה לארכיון: {str(e)}")
+        
+        with archive_status:
+            hot_rows, archived_rows, archived_months, archived_bytes = query_cache.read(
+                archive.ARCHIVE_SUMMARY_QUERY, tables=("reports",), label="archive_summary"
+            )[0]
+            st.caption(
+                f"בטבלה: {hot_rows} דיווחים · בארכיון: {archived_rows} דיווחים "
+                f"ב-{archived_months} חודשים ({archived_bytes / 1024 / 1024:.1f} MB)"
+            )
+            if archived_months:
+                with st.expander("חודשים בארכיון"):
+                    st.dataframe(
+                        pd.DataFrame(
+                            query_cache.read(archive.ARCHIVE_MONTHS_QUERY, tables=("reports",), label="archive_months"),
+                            columns=['חודש', 'דיווחים', 'בתים', 'קבצים', 'הועבר']
+                        ),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+        
+        # גיבוי, בדיקות תקינות ו-CHECKPOINT על הקובץ הראשי, עם מדידה לפני ואחרי
+        st.subheader("🧰 תחזוקה")
+        st.caption(
+            f"גודל הקובץ: {maintenance.file_size(database.path) / 1024 / 1024:.1f} MB · "
+            "דחיסת הקובץ (אחרי מחיקות) רק כשהאפליקציה אינה רצה: python manage.py maintenance --compact"
+        )
+        if st.button("🧰 גיבוי ובדיקת תקינות"):
+            try:
+                queue.flush()
+                with st.spinner("מגבה ובודק..."):
+                    measured_before = maintenance.measure(database)
+                    backup_path, backup_bytes = maintenance.backup(database, maintenance.backup_dir(database.path))
+                    checks = maintenance.check(database)
+                    maintenance.checkpoint(database)
+                    measured_after = maintenance.measure(database)
+                st.success(f"✅ גיבוי נשמר ב-{backup_path} ({backup_bytes / 1024 / 1024:.1f} MB)")
+                failed = [(label, count) for _, label, count in checks if count]
+                if failed:
+                    st.warning("נמצאו בעיות: " + " · ".join(f"{label}: {count}" for label, count in failed))
+                else:
+                    st.info("כל בדיקות התקינות עברו")
+                st.metric(
+                    "גודל הקובץ [MB]", f"{measured_after['bytes'] / 1024 / 1024:.1f}",
+                    f"{(measured_after['bytes'] - measured_before['bytes']) / 1024 / 1024:+.1f}", delta_color="inverse"
+                )
+                st.dataframe(
+                    pd.DataFrame([
+                        (name, round(seconds * 1000, 1), round(measured_after["queries"][name] * 1000, 1))
+                        for name, seconds in measured_before["queries"].items()
+                    ], columns=['שאילתה', 'לפני [ms]', 'אחרי [ms]']),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            except Exception as e:
+                st.error(f"❌ שגיאה בתחזוקה: {str(e)}")
+
+        # מדדי מטמון השאילתות של דפי הניהול
+        st.subheader("⚡ מטמון שאילתות")
+        cache_stats = query_cache.stats()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("פגיעות", cache_stats["hits"])
+        with col2:
+            st.metric("החטאות", cache_stats["misses"])
+        with col3:
+            st.metric("אחוז פגיעה", f"{cache_stats['hit_rate']:.0%}")
+        st.caption(f"תוצאות שמורות במטמון: {cache_stats['entries']}")
+    
+    elif admin_tab == "ביצועים":
+        st.subheader("⏱️ ביצועים")
+        st.caption(f"לפי {metrics.MAX_SAMPLES} המדידות האחרונות מאז עליית השרת; שאילתה שהוגשה מהמטמון אינה נמדדת")
+        
+        summary = database.metrics.summary()
+        if summary:
+            # זמני השאילתות והעמודים לפי תווית, מהאיטי לפי p95
+            df_summary = pd.DataFrame(summary)
+            for column in ("p50", "p95", "p99", "max"):
+                df_summary[column] = (df_summary[column] * 1000).round(1)
+            df_summary["kind"] = df_summary["kind"].map({"query": "שאילתה", "page": "עמוד", "fragment": "רענון"})
+            df_summary = df_summary.rename(columns={
+                "kind": "סוג", "label": "תווית", "count": "הרצות", "errors": "שגיאות",
+                "p50": "p50 [ms]", "p95": "p95 [ms]", "p99": "p99 [ms]", "max": "מקסימום [ms]",
+                "rows": "שורות בממוצע",
+            })
+            st.dataframe(df_summary, use_container_width=True, hide_index=True)
+            
+            # השאילתות האיטיות ביותר, עם תוכנית הביצוע שלהן
+            st.subheader("🐢 השאילתות האיטיות ביותר")
+            slowest = database.metrics.slowest()
+            st.dataframe(
+                pd.DataFrame([
+                    (
+                        sample["label"], round(sample["seconds"] * 1000, 1), sample["rows"], sample["error"],
+                        datetime.fromtimestamp(sample["time"], clock.ISRAEL).strftime('%d/%m/%Y %H:%M:%S'),
+                    )
+                    for sample in slowest
+                ], columns=['תווית', 'משך [ms]', 'שורות', 'שגיאה', 'זמן']),
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            explainable = [sample for sample in slowest if metrics.explainable(sample["query"])]
+            if explainable:
+                chosen = st.selectbox(
+                    "שאילתה:",
+                    range(len(explainable)),
+                    format_func=lambda i: f"{explainable[i]['label']} ({explainable[i]['seconds'] * 1000:.1f} ms)"
+                )
+                # EXPLAIN ANALYZE מריץ את השאילתה שוב, ולכן רק בלחיצה
+                if st.button("🔍 EXPLAIN ANALYZE"):
+                    sample = explainable[chosen]
+                    try:
+                        plan = replica.read(
+                            "EXPLAIN ANALYZE " + sample["query"], sample["params"], label="explain_analyze"
+                        )
+                        st.code(plan[0][1], language=None)
+                    except Exception as e:
+                        st.error(f"❌ שגיאה בהרצת EXPLAIN ANALYZE: {str(e)}")
+        else:
+            st.info("אין עדיין מדידות")
+        
+        if st.button("🧹 איפוס המדידות"):
+            database.metrics.clear()
+            st.rerun()
+    
+    # כפתור יציאה
+    if st.button("🚪 יציאה מדף ניהול"):
+        st.session_state.access_granted = False
+        st.rerun()
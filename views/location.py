@@ -0,0 +1,50 @@
+"""עמוד היכן אני כעת"""
+import streamlit as st
+
+import clock
+
+
+def render(queue):
+    st.title("👀 היכן אני כעת")
+    st.markdown("---")
+    
+    # טופס דיווח היכן אני כעת
+    with st.form("green_eyes_form", clear_on_submit=True):
+        st.subheader("דיווח מיקום נוכחי")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            personal_id = st.text_input("מ.א - ארבע ספרות אחרונות*", placeholder="הכנס מספר", max_chars=4)
+
+        
+        with col2:
+            current_location = st.text_input("מיקום נוכחי *", placeholder="הכנס מיקום חופשי")
+
+            on_shift = st.radio("? האם אתה במשמרת או בפעילות", ["כן", "לא"])
+            
+        # כפתור שליחה
+        submitted = st.form_submit_button("📍 עדכן מיקום", type="primary")
+        
+        if submitted:
+            # בדיקת שדות חובה
+            if not personal_id or not current_location.strip():
+                st.error("❌ נא למלא את כל השדות הנדרשים")
+            else:
+                try:
+                    timestamp = clock.now()
+                    queue.submit("green_eyes", {
+                        "personal_id": personal_id,
+                        "current_location": current_location.strip(),
+                        "on_shift": on_shift,
+                        "timestamp": timestamp,
+                    })
+                    
+                    st.success(f"✅ דווח בהצלחה")
+                    st.balloons()
+                    
+                except Exception as e:
+                    st.error(f"❌ שגיאה בשמירת הנתונים: {str(e)}")
+
+    # הצגת מי כבר דיווח היום
+    st.markdown("---")
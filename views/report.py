@@ -0,0 +1,163 @@
+"""עמוד דיווח משמרת (כניסה ויציאה)"""
+import streamlit as st
+
+import clock
+from queries import ROSTER_CHOICES_QUERY
+
+# אפשרויות הטופס כל עוד לא נטענה רשימת עובדים
+DEFAULT_RAHALS = ["ויסאם אסד" , "יובל שטפל" , "דניאל הנו" , "נזיה הנו" , "אסף גבור" , "נתי שיינפלד","עופר בצלאל","מאור טירי","בסאם דובאה" ,"גלעד ששון","ראיד רחאל"]
+DEFAULT_LOCATIONS = ["משגב","צניפים", "ג'וליס"]
+OTHER_LOCATION = "אחר באישור הרחל"
+
+
+def render(query_cache, queue, shifts):
+    # כותרת ראשית
+    st.title("""📝 דוח משמרת""")
+    st.markdown("---")
+
+    # בחירת סוג דיווח
+    report_type = st.selectbox(
+        "בחר סוג דיווח:", 
+        ["entry", "exit"], 
+        format_func=lambda x: "🟢 כניסה למשמרת" if x == "entry" else "🔴 יציאה ממשמרת"
+    )
+    
+
+    # המ.א מחוץ לטופס, כדי שהמשמרת הפתוחה תוצג עוד לפני השליחה
+    personal_id = st.text_input("מ.א - ארבע ספרות אחרונות*", placeholder="הכנס מספר", max_chars=4 ).strip()
+    open_shift = shifts.get(personal_id) if personal_id else None
+
+    # טופס הדיווח
+    with st.form("report_form", clear_on_submit=True):
+        st.subheader(f"{'כניסה למשמרת' if report_type == 'entry' else 'יציאה ממשמרת'}")
+        
+        # המשמרת הפתוחה של העובד - מתעדכנת אחרי השליחה
+        shift_status = st.empty()
+        if open_shift is not None:
+            open_location, open_since = open_shift
+            open_hours = (clock.now() - open_since).total_seconds() / 3600
+            shift_text = f"משמרת פתוחה מ-{open_since.astimezone(clock.ISRAEL).strftime('%d/%m/%Y %H:%M')} ב{open_location or 'מיקום לא ידוע'} ({open_hours:.1f} שעות)"
+            if report_type == "entry":
+                shift_status.warning(f"⚠️ {shift_text} - יש לדווח יציאה לפני כניסה חדשה")
+            else:
+                shift_status.info(f"🕒 {shift_text}")
+        elif personal_id and report_type == "exit":
+            shift_status.warning("⚠️ לא נמצאה כניסה פתוחה למ.א זה")
+        
+        # אפשרויות הבחירה מרשימת העובדים
+        roster_rahals, roster_locations = query_cache.read(
+            ROSTER_CHOICES_QUERY, tables=("roster",), label="roster_choices"
+        )[0]
+        
+        rahal = st.selectbox("""רח"ל""", roster_rahals or DEFAULT_RAHALS)
+        
+        # שדות ספציפיים לסוג דיווח
+        if report_type == "entry":
+            col3, col4 = st.columns(2)
+            
+            with col3:
+                work_location = st.selectbox("מיקום עבודה:" , (roster_locations or DEFAULT_LOCATIONS) + [OTHER_LOCATION])
+                
+            with col4:
+                replacing_who = st.text_input("? מי חפף אותי בכניסה למשמרת:",placeholder="לא הועברה חפיפה")
+    
+
+            # תאריך ושעה נוכחיים לתצוגה - הערכים שנשמרים נגזרים מזמן השליחה
+            current = clock.now()
+
+            
+            col5, col6 = st.columns(2)
+            with col5:
+                st.text_input("תאריך תחילת משמרת:", value=current.strftime('%d/%m/%Y'), disabled=True)
+            with col6:
+                st.text_input("שעת תחילת משמרת:", value=current.strftime('%H:%M'), disabled=True)
+
+            # משתנים ריקים ליציאה
+            replacement_person = "לא הועברה חפיפה"
+            reports_count = None
+            special_notes = None
+
+        else:  # exit
+            col3, col4 = st.columns(2)
+            
+            with col3:
+                replacement_person  = st.text_input("? את מי חפפתי ביציאה מהמשמרת:",placeholder="לא הועברה חפיפה")
+
+            
+            with col4:
+                reports_count = st.number_input(" מספר דיווחים שהעלית במשמרת -נתון זה לא בוחן את עבודתך *:", min_value=0, step=1, value=0)
+            
+            # תאריך ושעה נוכחיים לתצוגה (לא ניתנים לשינוי) - הערכים שנשמרים נגזרים מזמן השליחה
+            current = clock.now()
+            
+            col5, col6 = st.columns(2)
+            with col5:
+                st.text_input("תאריך סיום משמרת:", value=current.strftime('%d/%m/%Y'), disabled=True)
+            with col6:
+                st.text_input("שעת סיום משמרת:", value=current.strftime('%H:%M'), disabled=True)
+            
+            special_notes = st.text_area("הערות מיוחדות:", placeholder="הערות או דברים חשובים...")
+
+            # משתנים ריקים לכניסה
+            work_location = None
+            replacing_who = "לא הועברה חפיפה"
+
+        # כפתור שליחה
+        submitted = st.form_submit_button("📤 שלח דיווח", type="primary")
+
+        if submitted:
+            # בדיקת שדות חובה
+            required_fields_missing = []
+            if not personal_id:
+                required_fields_missing.append("מספר אישי")
+            if not rahal:
+                required_fields_missing.append("רח'ל")
+            if report_type == "exit" and reports_count is None:
+                required_fields_missing.append("מספר דיווחים")
+            if required_fields_missing:
+                st.error(f"❌ נא למלא את השדות הנדרשים: {', '.join(required_fields_missing)}")
+            elif personal_id and not personal_id.isdigit():
+                st.error("הכנס רק ספרות.")    
+            else:
+                # זמן אחד לדיווח - שדות התאריך והשעה נגזרים ממנו
+                timestamp = clock.now()
+                
+                # עדכון המשמרת הפתוחה לפני השליחה, כדי ששתי כניסות במקביל לא יתקבלו שתיהן
+                if report_type == "entry":
+                    accepted = shifts.open(personal_id, work_location, timestamp)
+                    closed_shift = None
+                else:
+                    accepted = True
+                    closed_shift = shifts.close(personal_id)
+                
+                if not accepted:
+                    st.error("❌ כבר קיימת משמרת פתוחה למ.א זה - יש לדווח יציאה לפני כניסה חדשה")
+                else:
+                    try:
+                        # האישור מוצג רק אחרי שההגשה נכתבה לתור בדיסק
+                        queue.submit("reports", {
+                            "report_type": report_type,
+                            "personal_id": personal_id,
+                            "rahal": rahal,
+                            "work_location": work_location,
+                            "replacing_who": replacing_who,
+                            "replacement_person": replacement_person,
+                            "reports_count": reports_count,
+                            "special_notes": special_notes,
+                            "timestamp": timestamp,
+                            **clock.report_times(report_type, timestamp),
+                        })
+                    
+                        shift_status.empty()
+                        st.success("✅ הדיווח נשלח בהצלחה!")
+                        if closed_shift is not None:
+                            st.info(f"משך המשמרת: {(timestamp - closed_shift[1]).total_seconds() / 3600:.2f} שעות")
+                        st.balloons()
+                    
+                    except Exception as e:
+                        # ההגשה לא נשמרה - המשמרת הפתוחה חוזרת למצבה הקודם
+                        shifts.restore(personal_id, closed_shift if report_type == "exit" else None)
+                        st.error(f"❌ שגיאה בשמירת הדיווח: {str(e)}")
+
+   
+    st.markdown("------")